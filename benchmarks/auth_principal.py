@@ -0,0 +1,71 @@
+"""Cost of loading the authenticated user as its graph grows.
+
+Compares the full User graph (followed, followers, likes, tweets) with
+the principal query used by authentication. Data is written inside a
+transaction that is rolled back at the end. Run against a disposable
+Postgres from the project root:
+    python -m benchmarks.auth_principal
+"""
+import asyncio
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.config import settings
+from src.database import SQLSession, UserAction
+from src.models import Like, Token, Tweet, User
+
+GRAPH_SIZES = (0, 100, 1_000, 10_000)
+ROUNDS = 200
+API_KEY = "bench-principal"
+
+
+async def grow(session: AsyncSession, user_id: int, size: int) -> None:
+    """Give the user size tweets, all of them liked by the user."""
+    if not size:
+        return
+    result = await session.execute(
+        insert(Tweet).returning(Tweet.id),
+        [{"tweet_data": "bench", "user_id": user_id} for _ in range(size)],
+    )
+    await session.execute(
+        insert(Like),
+        [{"user_id": user_id, "tweet_id": tweet_id} for tweet_id in result.scalars()],
+    )
+
+
+async def timed(call) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await call()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+async def main() -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+        user = User(name="bench", hashed_password="-", token=Token(api_key=API_KEY))
+        session.add(user)
+        await session.flush()
+        action = UserAction(db=SQLSession(session=session))
+        grown = 0
+        for size in GRAPH_SIZES:
+            await grow(session, user.id, size - grown)
+            grown = size
+            full = await timed(lambda: action.get(user_id=user.id))
+            principal = await timed(
+                lambda: action.get_principal_by_api_key(api_key=API_KEY)
+            )
+            print(
+                f"graph={size:<6} full user {full:8.2f} ms"
+                f"   principal {principal:6.2f} ms"
+            )
+        await trans.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""Size and encode/decode time of cache compressions for a typical feed page.
+
+Encoding serializes the page to JSON and wraps it into a stored entry,
+decoding turns the entry back into the JSON document sent to clients.
+
+Runs without Redis, from the project root:
+    python -m benchmarks.cache_codecs
+"""
+import json
+import timeit
+
+from src.cache.serializers import Codec, json_dumps, lz4, orjson
+
+ROUNDS = 1000
+PAGE_SIZE = 100
+
+
+def feed_page() -> dict:
+    return {
+        "tweets": [
+            {
+                "id": tweet_id,
+                "content": f"Tweet number {tweet_id} with some text about the weather",
+                "attachments": [f"static/images/{tweet_id}-{i}.jpg" for i in range(2)],
+                "author": {"id": tweet_id % 50, "name": f"user{tweet_id % 50}"},
+                "likes": [{"user_id": user_id} for user_id in range(tweet_id % 30)],
+            }
+            for tweet_id in range(PAGE_SIZE)
+        ]
+    }
+
+
+def main() -> None:
+    page = feed_page()
+    serializers = {"json": lambda data: json.dumps(data).encode()}
+    if orjson is not None:
+        serializers["orjson"] = json_dumps
+    compressions = ["none", "zlib"] + ["lz4"] * bool(lz4)
+    print(
+        f"{'serializer':<12}{'compression':<13}{'bytes':>8}"
+        f"{'encode, us':>12}{'decode, us':>12}"
+    )
+    for serializer, dumps in serializers.items():
+        for compression in compressions:
+            codec = Codec(compression=compression, min_compress_size=0)
+            raw = codec.dumps(dumps(page))
+            encode = timeit.timeit(lambda: codec.dumps(dumps(page)), number=ROUNDS)
+            decode = timeit.timeit(lambda: codec.loads(raw), number=ROUNDS)
+            print(
+                f"{serializer:<12}{compression:<13}{len(raw):>8}"
+                f"{encode / ROUNDS * 1e6:>12.1f}{decode / ROUNDS * 1e6:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
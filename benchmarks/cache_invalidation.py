@@ -0,0 +1,52 @@
+"""Namespace invalidation: SCAN + DELETE per key vs generation INCR.
+
+Run against a disposable Redis from the project root:
+    python -m benchmarks.cache_invalidation
+"""
+import asyncio
+import time
+
+import aioredis
+
+from src.cache import RedisCache
+from src.config import settings
+
+KEYS = 1_000_000
+BATCH = 10_000
+NAMESPACE = "bench"
+
+
+async def fill(redis: aioredis.Redis, prefix: str) -> None:
+    for start in range(0, KEYS, BATCH):
+        async with redis.pipeline(transaction=False) as pipe:
+            for i in range(start, start + BATCH):
+                pipe.set(f"{prefix}:{i}", "1")
+            await pipe.execute()
+
+
+async def scan_delete(redis: aioredis.Redis, key_parent: str) -> None:
+    async for key in redis.scan_iter(f"{key_parent}*"):
+        await redis.delete(key)
+
+
+async def main() -> None:
+    redis = aioredis.from_url(settings.CACHE_URL)
+    await redis.flushdb()
+
+    await fill(redis, NAMESPACE)
+    start = time.perf_counter()
+    await scan_delete(redis, NAMESPACE)
+    print(f"SCAN + DELETE, {KEYS} keys: {time.perf_counter() - start:.3f}s")
+
+    cache = RedisCache(redis=redis)
+    await fill(redis, await cache.versioned_key(NAMESPACE))
+    start = time.perf_counter()
+    await cache.delete_many(key_parent=NAMESPACE)
+    print(f"generation INCR, {KEYS} keys: {time.perf_counter() - start:.6f}s")
+
+    await redis.flushdb()
+    await redis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Per-request latency: client per request vs shared connection pool.
+
+Run against a live Redis from the project root:
+    python -m benchmarks.cache_pool
+"""
+import asyncio
+import statistics
+import time
+
+import aioredis
+
+from src.cache import RedisCache
+from src.cache.cache_service import close_cache_pool, init_cache_pool
+from src.config import settings
+
+REQUESTS = 2000
+CONCURRENCY = 50
+KEY = "bench:pool"
+
+
+async def client_per_request() -> float:
+    start = time.perf_counter()
+    cache = RedisCache(redis=aioredis.from_url(settings.CACHE_URL))
+    await cache.get_cache(key=KEY)
+    return time.perf_counter() - start
+
+
+async def shared_pool() -> float:
+    start = time.perf_counter()
+    cache = RedisCache(redis=aioredis.Redis(connection_pool=init_cache_pool()))
+    await cache.get_cache(key=KEY)
+    return time.perf_counter() - start
+
+
+async def run(request) -> list[float]:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one() -> float:
+        async with semaphore:
+            return await request()
+
+    return await asyncio.gather(*(one() for _ in range(REQUESTS)))
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    print(
+        f"{name:<20} mean={statistics.mean(timings) * 1000:.3f}ms "
+        f"p50={timings[len(timings) // 2] * 1000:.3f}ms "
+        f"p99={timings[int(len(timings) * 0.99)] * 1000:.3f}ms"
+    )
+
+
+async def main() -> None:
+    report("client per request", await run(client_per_request))
+    init_cache_pool()
+    report("shared pool", await run(shared_pool))
+    await close_cache_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""Throughput of concurrent units of work for several pool sizes.
+
+Every unit of work opens its own session, like a request does, and runs
+a query that holds the connection for a few milliseconds. Run against a
+live Postgres from the project root:
+    python -m benchmarks.db_pool
+"""
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.config import settings
+
+REQUESTS = 1000
+CONCURRENCY = 100
+POOL_SIZES = (1, 5, 10, 20, 40)
+QUERY = text("SELECT pg_sleep(0.005)")
+
+
+async def run(pool_size: int) -> float:
+    engine = create_async_engine(
+        settings.DATABASE_URL, pool_size=pool_size, max_overflow=0, pool_timeout=60
+    )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def unit_of_work() -> None:
+        async with semaphore, session_factory() as session:
+            await session.execute(QUERY)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(unit_of_work() for _ in range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return REQUESTS / elapsed
+
+
+async def main() -> None:
+    for pool_size in POOL_SIZES:
+        print(f"pool_size={pool_size:<4} {await run(pool_size):8.1f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
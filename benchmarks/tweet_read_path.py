@@ -0,0 +1,109 @@
+"""ORM objects vs Core rows for a page of tweets.
+
+Loads and serializes a 100 tweet page both ways, reporting time per page
+and peak memory allocated while building it. Data is written inside a
+transaction that is rolled back at the end. Run against a disposable
+Postgres from the project root:
+    python -m benchmarks.tweet_read_path
+"""
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.cache import json_dumps
+from src.config import settings
+from src.database import SQLSession, TweetAction
+from src.database.cruds import TWEET_GET
+from src.models import Like, Media, Tweet, User
+from src.models.dto import TweetDTO
+
+PAGE = 100
+LIKES = 20
+ATTACHMENTS = 2
+ROUNDS = 100
+
+
+async def seed(session: AsyncSession) -> list[int]:
+    users = [User(name=f"bench{i}", hashed_password="-") for i in range(LIKES)]
+    session.add_all(users)
+    await session.flush()
+    result = await session.execute(
+        insert(Tweet).returning(Tweet.id),
+        [{"tweet_data": "bench", "user_id": users[0].id} for _ in range(PAGE)],
+    )
+    tweet_ids = list(result.scalars())
+    await session.execute(
+        insert(Media),
+        [
+            {"image": f"static/images/{tweet_id}-{i}.png", "tweet_id": tweet_id}
+            for tweet_id in tweet_ids
+            for i in range(ATTACHMENTS)
+        ],
+    )
+    await session.execute(
+        insert(Like),
+        [
+            {"user_id": user.id, "tweet_id": tweet_id}
+            for tweet_id in tweet_ids
+            for user in users
+        ],
+    )
+    return tweet_ids
+
+
+def serialize_tweet(tweet: Tweet) -> dict:
+    return {
+        "id": tweet.id,
+        "content": tweet.tweet_data,
+        "attachments": [item.image for item in tweet.attachments],
+        "author": tweet.author.to_dict(),
+        "likes": [{"user_id": like.user_id} for like in tweet.likes],
+        "like_count": tweet.like_count,
+    }
+
+
+async def orm_page(action: TweetAction, tweet_ids: list[int]) -> list[bytes]:
+    """The tweet graph loaded as ORM objects, as the read path used to."""
+    async with action.db as db:
+        result = await db.session.execute(TWEET_GET.where(Tweet.id.in_(tweet_ids)))
+    return [json_dumps(serialize_tweet(tweet)) for tweet in result.scalars()]
+
+
+async def core_page(action: TweetAction, tweet_ids: list[int]) -> list[bytes]:
+    return [
+        json_dumps(TweetDTO.to_dict(tweet))
+        for tweet in await action.get_rows(tweet_ids=tweet_ids)
+    ]
+
+
+async def measure(page, action: TweetAction, tweet_ids: list[int]) -> tuple:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await page(action, tweet_ids)
+    elapsed = (time.perf_counter() - start) / ROUNDS * 1000
+    tracemalloc.start()
+    await page(action, tweet_ids)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+async def main() -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+        tweet_ids = await seed(session)
+        action = TweetAction(db=SQLSession(session=session))
+        for name, page in (("ORM", orm_page), ("Core", core_page)):
+            elapsed, peak = await measure(page, action, tweet_ids)
+            print(f"{name:<5} {elapsed:7.2f} ms/page   peak {peak:8.1f} KiB")
+        await trans.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+"""Full-text search latency on a large tweets table.
+
+Fills tweets with TWEETS rows of random words, then times the first and
+a deeper page of TweetAction.search for common and rare words, against
+the ILIKE scan that filtering all tweets amounts to. Data is written
+inside a transaction that is rolled back at the end. Run against a
+disposable Postgres from the project root:
+    python -m benchmarks.tweet_search
+"""
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.config import settings
+from src.database import SQLSession, TweetAction
+from src.models import Tweet, User
+
+TWEETS = 2_000_000
+ROUNDS = 20
+LIMIT = 50
+# word i is drawn with probability about 1 / (i + 1)
+WORDS = [f"word{i}" for i in range(5_000)]
+QUERIES = ("word1", "word10 word20", "word4000", '"word1 word2"')
+
+SEED = text(
+    """
+    INSERT INTO tweets (content, user_id)
+    SELECT (
+        SELECT string_agg(words[exp(random() * ln(cardinality(words)))::int], ' ')
+        FROM generate_series(1, 8 + n % 3)
+    ), :user_id
+    FROM generate_series(1, :count) AS n
+    CROSS JOIN (SELECT CAST(:words AS text[]) AS words) AS vocabulary
+    """
+)
+
+
+async def seed(session: AsyncSession) -> None:
+    user = User(name="bench", hashed_password="-")
+    session.add(user)
+    await session.flush()
+    await session.execute(
+        SEED, {"words": WORDS, "user_id": user.id, "count": TWEETS}
+    )
+    await session.execute(text("ANALYZE tweets"))
+
+
+async def timed(call) -> list[float]:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(f"{name:<32} p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+async def main() -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+        await seed(session)
+        action = TweetAction(db=SQLSession(session=session))
+        for query in QUERIES:
+            rows = await action.search(query=query, limit=LIMIT)
+            report(
+                f"search {query}",
+                await timed(lambda: action.search(query=query, limit=LIMIT)),
+            )
+            if len(rows) >= LIMIT:
+                after = (rows[-1].rank, rows[-1].tweet_id)
+                report(
+                    f"search {query}, page 2",
+                    await timed(
+                        lambda: action.search(query=query, limit=LIMIT, after=after)
+                    ),
+                )
+        # a rare word, the scan cannot stop early
+        word = QUERIES[2]
+        scan = (
+            select(Tweet.id).where(Tweet.tweet_data.ilike(f"%{word}%")).limit(LIMIT)
+        )
+        report(f"ilike {word}", await timed(lambda: session.execute(scan)))
+        await trans.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,10 +4,13 @@ from fastapi import FastAPI
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from src.cache import close_cache, init_cache
 from src.config import settings
+from src.database.database import close_db, init_db
+from src.database.instrumentation import track_queries
 from src import exceptions
-from src.exceptions import logger
-from src.routes import tokens, tweets, users
+from src.exceptions import logger, sql_logger
+from src.routes import metrics, tokens, tweets, users
 
 
 try:
@@ -29,6 +32,33 @@ app_api.include_router(tweets.router)
 app_api.include_router(users.router)
 app_api.include_router(tokens.router)
 app_api.include_router(tweets.public_router)
+app_api.include_router(metrics.router)
+
+
+@app_api.middleware("http")
+async def query_stats(request: Request, call_next):
+    """Statements run for the request, in the Server-Timing header and the
+    sql log."""
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = stats.server_timing
+    sql_logger.info(
+        f"{request.method} {request.url.path} - {stats.count} queries, "
+        f"{stats.duration * 1000:.1f} ms"
+    )
+    return response
+
+
+@app_api.on_event("startup")
+async def startup():
+    await init_cache()
+    await init_db()
+
+
+@app_api.on_event("shutdown")
+async def shutdown():
+    await close_cache()
+    await close_db()
 
 
 @app_api.exception_handler(exceptions.NotAllowedError)
@@ -39,6 +69,7 @@ app_api.include_router(tweets.public_router)
 @app_api.exception_handler(exceptions.InactiveUserError)
 @app_api.exception_handler(exceptions.UnAuthorizedError)
 @app_api.exception_handler(exceptions.CreateTweetError)
+@app_api.exception_handler(exceptions.InvalidCursorError)
 @app_api.exception_handler(Exception)
 async def unicorn_exception_handler(request: Request, exc: Exception):
     if not isinstance(exc, exceptions.BaseCustomExc):
@@ -1 +1,6 @@
-from .cache_service import get_cache, RedisCache
+from .base_cache_service import AbstractCache
+from .cache_service import get_cache, RedisCache, init_cache, close_cache
+from .two_tier_cache import LocalCache, TwoTierCache
+from .read_through import read_through, stats
+from .serializers import json_dumps, json_loads
+from .timelines import Timelines, get_timelines
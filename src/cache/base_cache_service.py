@@ -21,3 +21,27 @@ class AbstractCache(ABC):
     @abstractmethod
     async def delete_many(self, *args, **kwargs):
         raise NotImplementedError
+
+    @abstractmethod
+    async def delete_keys(self, *args, **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_with_ttl(self, *args, **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def acquire_lock(self, *args, **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def release_lock(self, *args, **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_many(self, *args, **kwargs):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set_many(self, *args, **kwargs):
+        raise NotImplementedError
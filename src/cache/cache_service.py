@@ -1,33 +1,191 @@
-import json
+import random
+import uuid
 
 import aioredis
 
 from src.config import settings
 
 from .base_cache_service import AbstractCache
+from .serializers import Codec
+from .two_tier_cache import (
+    KEYS_MESSAGE,
+    KEYS_SEPARATOR,
+    InvalidationListener,
+    LocalCache,
+    TwoTierCache,
+)
+
+# deletes the lock only if it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+TTL_POLICY = {
+    settings.App.CACHE_TWEET_PREFIX: settings.App.CACHE_TWEET_TTL,
+    settings.App.CACHE_USER_PREFIX: settings.App.CACHE_USER_TTL,
+}
+
+codec = Codec(
+    compression=settings.App.CACHE_COMPRESSION,
+    min_compress_size=settings.App.CACHE_COMPRESS_MIN_SIZE,
+)
+redis_pool: aioredis.ConnectionPool | None = None
+local_cache = LocalCache(
+    maxsize=settings.App.CACHE_LOCAL_SIZE, ttl=settings.App.CACHE_LOCAL_TTL
+)
+invalidation_listener = InvalidationListener(
+    local=local_cache, channel=settings.App.CACHE_INVALIDATION_CHANNEL
+)
+
+
+def init_cache_pool() -> aioredis.ConnectionPool:
+    """Create the process-wide connection pool, once per worker."""
+    global redis_pool
+    if redis_pool is None:
+        redis_pool = aioredis.ConnectionPool.from_url(
+            settings.CACHE_URL,
+            max_connections=settings.Redis.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.Redis.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.Redis.REDIS_SOCKET_CONNECT_TIMEOUT,
+            health_check_interval=settings.Redis.REDIS_HEALTH_CHECK_INTERVAL,
+        )
+    return redis_pool
+
+
+async def close_cache_pool() -> None:
+    global redis_pool
+    if redis_pool is not None:
+        await redis_pool.disconnect()
+        redis_pool = None
+
+
+async def init_cache() -> None:
+    pool = init_cache_pool()
+    if settings.App.CACHE_LOCAL_SIZE:
+        invalidation_listener.start(aioredis.Redis(connection_pool=pool))
+
+
+async def close_cache() -> None:
+    await invalidation_listener.stop()
+    await close_cache_pool()
+
+
+def expiry(key: str, ttl: int | None = None) -> int:
+    """TTL in seconds for key: the per-call override or the namespace
+    default, spread by jitter so entries written together do not expire
+    together."""
+    if ttl is None:
+        ttl = TTL_POLICY.get(key.partition(":")[0], settings.App.CACHE_DEFAULT_TTL)
+    jitter = settings.App.CACHE_TTL_JITTER
+    return max(1, round(ttl * random.uniform(1 - jitter, 1 + jitter)))
 
 
 class RedisCache(AbstractCache):
-    def __init__(self, redis_url: str) -> None:
-        self.redis = aioredis.from_url(redis_url)
+    """Redis cache of JSON documents with namespace versioning.
 
-    async def set_cache(self, data: dict | list | None, key: str) -> None:
+    The first segment of a key is its namespace. Stored keys carry the
+    current generation of their namespace, so invalidating a namespace
+    is a single INCR and the orphaned entries age out through their TTL.
+    """
+
+    def __init__(self, redis: aioredis.Redis, codec: Codec = codec) -> None:
+        self.redis = redis
+        self.codec = codec
+        self._generations: dict[str, int] = {}
+
+    async def _generation(self, namespace: str) -> int:
+        if namespace not in self._generations:
+            value = await self.redis.get(f"gen:{namespace}")
+            self._generations[namespace] = int(value or 0)
+        return self._generations[namespace]
+
+    async def versioned_key(self, key: str) -> str:
+        namespace, _, rest = key.partition(":")
+        generation = await self._generation(namespace)
+        return ":".join(filter(None, (namespace, f"v{generation}", rest)))
+
+    async def set_cache(
+        self, data: bytes | None, key: str, ttl: int | None = None
+    ) -> None:
         if data:
-            await self.redis.set(json.dumps(data), key)
+            await self.redis.set(
+                await self.versioned_key(key),
+                self.codec.dumps(data),
+                ex=expiry(key, ttl),
+            )
 
-    async def get_cache(self, key: str) -> list | dict | None:
-        data = await self.redis.get(key)
+    async def get_cache(self, key: str) -> bytes | None:
+        data = await self.redis.get(await self.versioned_key(key))
         if data:
-            return json.loads(data)
+            return self.codec.loads(data)
+        return None
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        values = await self.redis.mget([await self.versioned_key(key) for key in keys])
+        return [self.codec.loads(value) if value else None for value in values]
+
+    async def set_many(
+        self, mapping: dict[str, bytes], ttl: int | None = None
+    ) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, data in mapping.items():
+                pipe.set(
+                    await self.versioned_key(key),
+                    self.codec.dumps(data),
+                    ex=expiry(key, ttl),
+                )
+            await pipe.execute()
+
+    async def get_with_ttl(self, key: str) -> tuple[bytes | None, float | None]:
+        key = await self.versioned_key(key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            data, ttl = await pipe.get(key).pttl(key).execute()
+        if not data:
+            return None, None
+        return self.codec.loads(data), ttl / 1000 if ttl > 0 else None
+
+    async def acquire_lock(self, name: str, timeout: float) -> str | None:
+        token = uuid.uuid4().hex
+        if await self.redis.set(name, token, nx=True, px=int(timeout * 1000)):
+            return token
         return None
 
+    async def release_lock(self, name: str, token: str) -> None:
+        await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, name, token)
+
     async def delete_cache(self, key: str) -> None:
-        await self.redis.delete(key)
+        await self.redis.delete(await self.versioned_key(key))
+
+    async def delete_keys(self, keys: list[str], channel: str | None = None) -> None:
+        """Delete keys in one round trip, announcing it on channel in the
+        same pipeline."""
+        if not keys:
+            return
+        versioned = [await self.versioned_key(key) for key in keys]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*versioned)
+            if channel:
+                pipe.publish(channel, KEYS_MESSAGE + KEYS_SEPARATOR.join(keys))
+            await pipe.execute()
 
     async def delete_many(self, key_parent: str) -> None:
-        async for key in self.redis.scan_iter(f"{key_parent}*"):
-            await self.redis.delete(key)
+        self._generations[key_parent] = await self.redis.incr(f"gen:{key_parent}")
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self.redis.publish(channel, message)
 
 
-def get_cache() -> RedisCache:
-    return RedisCache(redis_url=settings.CACHE_URL)
+def get_cache() -> AbstractCache:
+    cache = RedisCache(redis=aioredis.Redis(connection_pool=init_cache_pool()))
+    if settings.App.CACHE_LOCAL_SIZE:
+        return TwoTierCache(
+            remote=cache,
+            local=local_cache,
+            channel=settings.App.CACHE_INVALIDATION_CHANNEL,
+        )
+    return cache
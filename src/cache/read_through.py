@@ -0,0 +1,143 @@
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from src.config import settings
+
+from .base_cache_service import AbstractCache
+from .serializers import json_dumps
+
+POLL_INTERVAL = 0.05
+DEFAULT_RECOMPUTE_TIME = 0.05
+# cached in place of objects that do not exist; whoever creates an object
+# deletes its key, the id may have been requested before
+TOMBSTONE = b"null"
+
+# lookups of this worker: hits, negative_hits, misses, coalesced
+stats: Counter = Counter()
+
+_in_flight: dict[str, asyncio.Future] = {}
+_recompute_time: dict[str, float] = {}
+
+
+class _LeaderCancelled(Exception):
+    """The request rebuilding a key was cancelled, its waiters retry."""
+
+
+def _namespace(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+def _refresh_early(key: str, remaining: float) -> bool:
+    """Probabilistic early expiration (XFetch).
+
+    The closer the key is to its expiry and the longer it takes to
+    rebuild, the more likely a reader is picked to refresh it.
+    """
+    delta = _recompute_time.get(_namespace(key), DEFAULT_RECOMPUTE_TIME)
+    beta = settings.App.CACHE_REFRESH_BETA
+    return -delta * beta * math.log(1.0 - random.random()) >= remaining
+
+
+async def read_through(
+    cache: AbstractCache,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int | None = None,
+    negative: bool = False,
+) -> bytes | None:
+    """Return the cached JSON document for key, rebuilding it with loader
+    on a miss. The loader returns the document as Python data, or None
+    when the object does not exist; with negative=True that is
+    remembered for CACHE_NEGATIVE_TTL seconds.
+
+    Only one coroutine per process and one lock holder across workers
+    rebuild a key; the others wait for the result or keep serving the
+    value that is about to expire.
+    """
+    data, remaining = await cache.get_with_ttl(key=key)
+    if data == TOMBSTONE:
+        stats["negative_hits"] += 1
+        return None
+    if data is not None:
+        stats["hits"] += 1
+        if (
+            remaining is None
+            or key in _in_flight
+            or not _refresh_early(key, remaining)
+        ):
+            return data
+    elif key in _in_flight:
+        stats["coalesced"] += 1
+        try:
+            return await asyncio.shield(_in_flight[key])
+        except _LeaderCancelled:
+            return await read_through(cache, key, loader, ttl=ttl, negative=negative)
+    else:
+        stats["misses"] += 1
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        result = await _rebuild(
+            cache, key, loader, ttl=ttl, negative=negative, stale=data
+        )
+    except asyncio.CancelledError:
+        # a client gone away must not fail the requests waiting on it
+        future.set_exception(_LeaderCancelled())
+        future.exception()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # waiters re-raise it, nobody else has to retrieve it
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _in_flight[key]
+
+
+async def _rebuild(
+    cache: AbstractCache,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int | None,
+    negative: bool,
+    stale: bytes | None,
+) -> bytes | None:
+    lock_name = f"lock:{key}"
+    token = await cache.acquire_lock(
+        name=lock_name, timeout=settings.App.CACHE_LOCK_TIMEOUT
+    )
+    if token is None:
+        if stale is not None:
+            return stale
+        deadline = time.monotonic() + settings.App.CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL)
+            data, _ = await cache.get_with_ttl(key=key)
+            if data is not None:
+                return None if data == TOMBSTONE else data
+        # the lock holder is too slow or gone, do not keep the request waiting
+    try:
+        start = time.monotonic()
+        data = await loader()
+        _recompute_time[_namespace(key)] = time.monotonic() - start
+        if data is None:
+            if negative:
+                await cache.set_cache(
+                    data=TOMBSTONE, key=key, ttl=settings.App.CACHE_NEGATIVE_TTL
+                )
+            return None
+        payload = json_dumps(data)
+        await cache.set_cache(data=payload, key=key, ttl=ttl)
+        return payload
+    finally:
+        if token is not None:
+            await cache.release_lock(name=lock_name, token=token)
@@ -0,0 +1,77 @@
+import json
+import zlib
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import lz4.frame as lz4
+except ImportError:
+    lz4 = None
+
+FORMAT_JSON = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZ4 = 2
+
+COMPRESSIONS = {
+    "none": COMPRESSION_NONE,
+    "zlib": COMPRESSION_ZLIB,
+    "lz4": COMPRESSION_LZ4,
+}
+
+
+def json_dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def json_loads(payload: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class Codec:
+    """Storage format of cache entries.
+
+    Cached values are JSON documents, so they are stored and sent to
+    clients without decoding. An entry is a two byte header (format,
+    compression) followed by the payload. Entries without a header are
+    plain JSON written by earlier releases.
+    """
+
+    def __init__(self, compression: str, min_compress_size: int) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        if compression == "lz4" and lz4 is None:
+            raise ValueError("lz4 is not installed")
+        self.compression = COMPRESSIONS[compression]
+        self.min_compress_size = min_compress_size
+
+    def dumps(self, payload: bytes) -> bytes:
+        """Stored entry for a JSON document."""
+        compression = COMPRESSION_NONE
+        if self.compression and len(payload) >= self.min_compress_size:
+            compression = self.compression
+            if compression == COMPRESSION_ZLIB:
+                payload = zlib.compress(payload)
+            else:
+                payload = lz4.compress(payload)
+        return bytes((FORMAT_JSON, compression)) + payload
+
+    def loads(self, raw: bytes) -> bytes:
+        """JSON document of a stored entry."""
+        if raw[0] != FORMAT_JSON:
+            return raw
+        compression, payload = raw[1], raw[2:]
+        if compression == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        elif compression == COMPRESSION_LZ4:
+            payload = lz4.decompress(payload)
+        return payload
@@ -0,0 +1,109 @@
+import aioredis
+
+from src.config import settings
+
+from .cache_service import init_cache_pool
+
+# adds ARGV[2:] to an existing timeline only, a missing one is built in full
+# on its next read
+ADD_SCRIPT = """
+if redis.call("exists", KEYS[1]) == 0 then
+    return 0
+end
+for i = 2, #ARGV do
+    redis.call("zadd", KEYS[1], ARGV[i], ARGV[i])
+end
+redis.call("zremrangebyrank", KEYS[1], 0, -tonumber(ARGV[1]) - 1)
+return 1
+"""
+# marks a built timeline that is still empty, never returned by reads
+SENTINEL = 0
+
+
+class Timelines:
+    """Home timelines: per user sorted sets of tweet ids scored by id.
+
+    Tweets of authors with more than TIMELINE_FANOUT_LIMIT followers are
+    not pushed; those authors are kept in a set and their tweets are
+    merged into the feed at read time.
+    """
+
+    def __init__(self, redis: aioredis.Redis) -> None:
+        self.redis = redis
+        self.prefix = settings.App.TIMELINE_PREFIX
+        self.max_size = settings.App.TIMELINE_MAX_SIZE
+        self.ttl = settings.App.TIMELINE_TTL
+
+    def key(self, user_id: int) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    @property
+    def celebrities_key(self) -> str:
+        return f"{self.prefix}:celebrities"
+
+    async def exists(self, user_id: int) -> bool:
+        return bool(await self.redis.exists(self.key(user_id)))
+
+    async def build(self, user_id: int, tweet_ids: list[int]) -> None:
+        key = self.key(user_id)
+        mapping = {SENTINEL: SENTINEL, **{item: item for item in tweet_ids}}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.zadd(key, mapping)
+            pipe.zremrangebyrank(key, 0, -self.max_size - 1)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def push(self, user_ids: list[int], tweet_id: int) -> None:
+        """Add the tweet to the existing timelines of user_ids."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.eval(ADD_SCRIPT, 1, self.key(user_id), self.max_size, tweet_id)
+            await pipe.execute()
+
+    async def add(self, user_id: int, tweet_ids: list[int]) -> None:
+        if tweet_ids:
+            await self.redis.eval(
+                ADD_SCRIPT, 1, self.key(user_id), self.max_size, *tweet_ids
+            )
+
+    async def remove(self, user_id: int, tweet_ids: list[int]) -> None:
+        if tweet_ids:
+            await self.redis.zrem(self.key(user_id), *tweet_ids)
+
+    async def oldest(self, user_id: int) -> int | None:
+        """Oldest tweet id the timeline still holds."""
+        items = await self.redis.zrangebyscore(
+            self.key(user_id), f"({SENTINEL}", "+inf", start=0, num=1
+        )
+        return int(items[0]) if items else None
+
+    async def read(
+        self, user_id: int, limit: int, before_id: int | None = None
+    ) -> list[int]:
+        """Newest tweet ids first, older than before_id if given."""
+        key = self.key(user_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrevrangebyscore(
+                key,
+                f"({before_id}" if before_id else "+inf",
+                f"({SENTINEL}",
+                start=0,
+                num=limit,
+            )
+            pipe.expire(key, self.ttl)
+            items, _ = await pipe.execute()
+        return [int(item) for item in items]
+
+    async def celebrities(self) -> list[int]:
+        return [int(item) for item in await self.redis.smembers(self.celebrities_key)]
+
+    async def set_celebrity(self, user_id: int, celebrity: bool) -> None:
+        if celebrity:
+            await self.redis.sadd(self.celebrities_key, user_id)
+        else:
+            await self.redis.srem(self.celebrities_key, user_id)
+
+
+def get_timelines() -> Timelines:
+    return Timelines(redis=aioredis.Redis(connection_pool=init_cache_pool()))
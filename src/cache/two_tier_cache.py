@@ -0,0 +1,188 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any
+
+import aioredis
+
+from src.exceptions import logger
+
+from .base_cache_service import AbstractCache
+
+if TYPE_CHECKING:
+    from .cache_service import RedisCache
+
+KEY_MESSAGE = "key:"
+KEYS_MESSAGE = "keys:"
+NAMESPACE_MESSAGE = "namespace:"
+# keys never contain a newline
+KEYS_SEPARATOR = "\n"
+
+
+class LocalCache:
+    """Bounded in-process LRU with a TTL per entry."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def delete_namespace(self, namespace: str) -> None:
+        prefix = f"{namespace}:"
+        for key in [
+            key for key in self._data if key == namespace or key.startswith(prefix)
+        ]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TwoTierCache(AbstractCache):
+    """Local LRU in front of Redis.
+
+    Invalidations are published to every worker, so each of them drops
+    its local copy; the local TTL only bounds staleness when a message
+    is lost while a worker is reconnecting.
+    """
+
+    def __init__(self, remote: "RedisCache", local: LocalCache, channel: str) -> None:
+        self.remote = remote
+        self.local = local
+        self.channel = channel
+
+    async def get_cache(self, key: str) -> bytes | None:
+        if (data := self.local.get(key)) is not None:
+            return data
+        if (data := await self.remote.get_cache(key=key)) is not None:
+            self.local.set(key, data)
+        return data
+
+    async def get_with_ttl(self, key: str) -> tuple[bytes | None, float | None]:
+        if (data := self.local.get(key)) is not None:
+            return data, None
+        data, ttl = await self.remote.get_with_ttl(key=key)
+        if data is not None:
+            self.local.set(key, data)
+        return data, ttl
+
+    async def get_many(self, keys: list[str]) -> list[bytes | None]:
+        result = [self.local.get(key) for key in keys]
+        missing = [key for key, data in zip(keys, result) if data is None]
+        if missing:
+            fetched = dict(zip(missing, await self.remote.get_many(keys=missing)))
+            for key, data in fetched.items():
+                if data is not None:
+                    self.local.set(key, data)
+            result = [
+                fetched[key] if data is None else data
+                for key, data in zip(keys, result)
+            ]
+        return result
+
+    async def set_cache(
+        self, data: bytes | None, key: str, ttl: int | None = None
+    ) -> None:
+        await self.remote.set_cache(data=data, key=key, ttl=ttl)
+        if data:
+            self.local.set(key, data)
+
+    async def set_many(
+        self, mapping: dict[str, bytes], ttl: int | None = None
+    ) -> None:
+        await self.remote.set_many(mapping=mapping, ttl=ttl)
+        for key, data in mapping.items():
+            self.local.set(key, data)
+
+    async def delete_cache(self, key: str) -> None:
+        self.local.delete(key)
+        await self.remote.delete_cache(key=key)
+        await self.remote.publish(self.channel, KEY_MESSAGE + key)
+
+    async def delete_keys(self, keys: list[str]) -> None:
+        for key in keys:
+            self.local.delete(key)
+        await self.remote.delete_keys(keys=keys, channel=self.channel)
+
+    async def delete_many(self, key_parent: str) -> None:
+        self.local.delete_namespace(key_parent)
+        await self.remote.delete_many(key_parent=key_parent)
+        await self.remote.publish(self.channel, NAMESPACE_MESSAGE + key_parent)
+
+    async def acquire_lock(self, name: str, timeout: float) -> str | None:
+        return await self.remote.acquire_lock(name=name, timeout=timeout)
+
+    async def release_lock(self, name: str, token: str) -> None:
+        await self.remote.release_lock(name=name, token=token)
+
+
+class InvalidationListener:
+    """Background task applying published invalidations to the local cache."""
+
+    def __init__(self, local: LocalCache, channel: str) -> None:
+        self.local = local
+        self.channel = channel
+        self._task: asyncio.Task | None = None
+
+    def start(self, redis: aioredis.Redis) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(redis))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def apply(self, message: str) -> None:
+        if message.startswith(KEY_MESSAGE):
+            self.local.delete(message[len(KEY_MESSAGE):])
+        elif message.startswith(KEYS_MESSAGE):
+            for key in message[len(KEYS_MESSAGE):].split(KEYS_SEPARATOR):
+                self.local.delete(key)
+        elif message.startswith(NAMESPACE_MESSAGE):
+            self.local.delete_namespace(message[len(NAMESPACE_MESSAGE):])
+
+    async def _listen(self, redis: aioredis.Redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # messages may have been missed while (re)connecting
+                    self.local.clear()
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if message is not None:
+                            self.apply(message["data"].decode())
+            except aioredis.RedisError:
+                logger.exception("Cache invalidation listener disconnected")
+                self.local.clear()
+                await asyncio.sleep(1)
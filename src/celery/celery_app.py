@@ -5,10 +5,23 @@ import time
 from celery import Celery
 from src.config import settings
 
+from .purge import purge, purge_deleted
+from .scores import refresh_scores
+from .timelines import backfill, fan_out, prune
 from .utils import remove_files_from_disk, write_to_disk
 
 celery_app = Celery(__name__)
 celery_app.conf.broker_url = settings.CELERY_BROKER_URL
+celery_app.conf.beat_schedule = {
+    "refresh_tweet_scores": {
+        "task": "refresh_tweet_scores",
+        "schedule": settings.App.TWEET_SCORES_REFRESH_INTERVAL,
+    },
+    "purge_deleted_tweets": {
+        "task": "purge_deleted_tweets",
+        "schedule": settings.App.TWEET_PURGE_INTERVAL,
+    },
+}
 
 
 @celery_app.task(name="load_file")
@@ -24,3 +37,39 @@ def load_file(data: str, filename: str) -> dict:
 def remove_files(data: list[str]):
     asyncio.run(remove_files_from_disk(data))
     return {"result": "All files was removed"}
+
+
+@celery_app.task(name="fan_out_tweet")
+def fan_out_tweet(tweet_id: int, author_id: int):
+    asyncio.run(fan_out(tweet_id=tweet_id, author_id=author_id))
+    return {"result": "Tweet was added to timelines"}
+
+
+@celery_app.task(name="backfill_timeline")
+def backfill_timeline(user_id: int, followed_ids: list[int]):
+    asyncio.run(backfill(user_id=user_id, followed_ids=followed_ids))
+    return {"result": "Timeline was backfilled"}
+
+
+@celery_app.task(name="prune_timeline")
+def prune_timeline(user_id: int, unfollowed_id: int):
+    asyncio.run(prune(user_id=user_id, unfollowed_id=unfollowed_id))
+    return {"result": "Timeline was pruned"}
+
+
+@celery_app.task(name="refresh_tweet_scores")
+def refresh_tweet_scores():
+    asyncio.run(refresh_scores())
+    return {"result": "Tweet scores were refreshed"}
+
+
+@celery_app.task(name="purge_tweet")
+def purge_tweet(tweet_id: int):
+    asyncio.run(purge(tweet_id=tweet_id))
+    return {"result": "Tweet was purged"}
+
+
+@celery_app.task(name="purge_deleted_tweets")
+def purge_deleted_tweets():
+    asyncio.run(purge_deleted())
+    return {"result": "Deleted tweets were purged"}
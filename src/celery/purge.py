@@ -0,0 +1,76 @@
+from collections.abc import Awaitable, Callable, Sequence
+
+from sqlalchemy import Row, delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import settings
+from src.models import Like, Media, Tweet
+
+from .utils import remove_files_from_disk, task_engine
+
+
+async def _delete_in_batches(
+    engine: AsyncEngine,
+    stmt,
+    on_batch: Callable[[Sequence[Row]], Awaitable[None]] | None = None,
+) -> int:
+    """Run stmt, a DELETE of at most one batch, until it deletes nothing.
+    Every batch is its own short transaction whose returned rows are passed
+    to on_batch. Returns the number of deleted rows."""
+    deleted = 0
+    while True:
+        async with engine.begin() as conn:
+            rows = (await conn.execute(stmt)).all()
+        deleted += len(rows)
+        if on_batch is not None:
+            await on_batch(rows)
+        if len(rows) < settings.App.TWEET_PURGE_BATCH_SIZE:
+            return deleted
+
+
+async def _remove_images(rows: Sequence[Row]) -> None:
+    await remove_files_from_disk([row.image for row in rows])
+
+
+async def _purge(engine: AsyncEngine, tweet_id: int) -> None:
+    batch = settings.App.TWEET_PURGE_BATCH_SIZE
+    likes = select(Like.user_id).where(Like.tweet_id == tweet_id).limit(batch)
+    await _delete_in_batches(
+        engine,
+        delete(Like)
+        .where(Like.tweet_id == tweet_id, Like.user_id.in_(likes.scalar_subquery()))
+        .returning(Like.user_id),
+    )
+    media = select(Media.id).where(Media.tweet_id == tweet_id).limit(batch)
+    await _delete_in_batches(
+        engine,
+        delete(Media)
+        .where(Media.id.in_(media.scalar_subquery()))
+        .returning(Media.image),
+        on_batch=_remove_images,
+    )
+    async with engine.begin() as conn:
+        await conn.execute(
+            delete(Tweet).where(Tweet.id == tweet_id, Tweet.deleted_at.is_not(None))
+        )
+
+
+async def purge(tweet_id: int) -> None:
+    """Delete the likes, media, files and row of a deleted tweet."""
+    async with task_engine() as engine:
+        await _purge(engine, tweet_id)
+
+
+async def purge_deleted() -> None:
+    """Purge deleted tweets whose task was lost, oldest first."""
+    stmt = (
+        select(Tweet.id)
+        .where(Tweet.deleted_at.is_not(None))
+        .order_by(Tweet.deleted_at)
+        .limit(settings.App.TWEET_PURGE_BATCH_SIZE)
+    )
+    async with task_engine() as engine:
+        async with engine.connect() as conn:
+            tweet_ids = list((await conn.execute(stmt)).scalars())
+        for tweet_id in tweet_ids:
+            await _purge(engine, tweet_id)
@@ -0,0 +1,12 @@
+from sqlalchemy import text
+
+from .utils import task_engine
+
+# readers keep using the old contents while the view is rebuilt
+REFRESH_SCORES = text("REFRESH MATERIALIZED VIEW CONCURRENTLY tweet_scores")
+
+
+async def refresh_scores() -> None:
+    async with task_engine() as engine:
+        async with engine.begin() as conn:
+            await conn.execute(REFRESH_SCORES)
@@ -0,0 +1,75 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import aioredis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.cache.timelines import Timelines
+from src.config import settings
+from src.models import Follower, Tweet
+
+from .utils import task_engine
+
+FAN_OUT_BATCH = 1000
+
+
+@asynccontextmanager
+async def connect() -> AsyncIterator[tuple[AsyncConnection, Timelines]]:
+    redis = aioredis.from_url(settings.CACHE_URL)
+    try:
+        async with task_engine() as engine, engine.connect() as conn:
+            yield conn, Timelines(redis=redis)
+    finally:
+        await redis.close()
+
+
+async def recent_tweets(
+    conn: AsyncConnection, author_ids: list[int], min_id: int = 0
+) -> list[int]:
+    stmt = (
+        select(Tweet.id)
+        .where(
+            Tweet.user_id.in_(author_ids),
+            Tweet.id > min_id,
+            Tweet.deleted_at.is_(None),
+        )
+        .order_by(Tweet.id.desc())
+        .limit(settings.App.TIMELINE_MAX_SIZE)
+    )
+    return list((await conn.execute(stmt)).scalars())
+
+
+async def fan_out(tweet_id: int, author_id: int) -> None:
+    """Push a new tweet to the timelines of its author and followers."""
+    async with connect() as (conn, timelines):
+        await timelines.push([author_id], tweet_id)
+        followers = await conn.scalar(
+            select(func.count()).where(Follower.followed_id == author_id)
+        )
+        celebrity = followers > settings.App.TIMELINE_FANOUT_LIMIT
+        await timelines.set_celebrity(author_id, celebrity)
+        if celebrity:
+            return
+        result = await conn.stream(
+            select(Follower.follower_id).where(Follower.followed_id == author_id)
+        )
+        async for rows in result.partitions(FAN_OUT_BATCH):
+            await timelines.push([row.follower_id for row in rows], tweet_id)
+
+
+async def backfill(user_id: int, followed_ids: list[int]) -> None:
+    """Add recent tweets of newly followed authors to the timeline."""
+    async with connect() as (conn, timelines):
+        celebrities = set(await timelines.celebrities())
+        if authors := [item for item in followed_ids if item not in celebrities]:
+            await timelines.add(user_id, await recent_tweets(conn, authors))
+
+
+async def prune(user_id: int, unfollowed_id: int) -> None:
+    """Drop tweets of an unfollowed author from the timeline."""
+    async with connect() as (conn, timelines):
+        if (oldest := await timelines.oldest(user_id)) is not None:
+            await timelines.remove(
+                user_id, await recent_tweets(conn, [unfollowed_id], min_id=oldest - 1)
+            )
@@ -1,6 +1,26 @@
 import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 import aiofiles  # type: ignore[import]
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.config import settings
+
+
+@asynccontextmanager
+async def task_engine() -> AsyncIterator[AsyncEngine]:
+    # every task runs in its own event loop, pooled connections cannot be reused
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=NullPool,
+        connect_args=settings.Database.connect_args,
+    )
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
 
 
 async def write_to_disk(content: bytes, file_path: str) -> None:
@@ -1,6 +1,8 @@
 import os
+import uuid
 from pathlib import Path
 
+import asyncpg
 from pydantic import BaseSettings
 
 BASE_DIR = Path(__file__).parent.parent
@@ -24,12 +26,43 @@ class App(BaseSettings):
     MAX_IMG_SIZE_MB: int = 3
     CACHE_TWEET_PREFIX: str = "tweets"
     CACHE_USER_PREFIX: str = "users"
+    CACHE_DEFAULT_TTL: int = 300
+    CACHE_TWEET_TTL: int = 120
+    CACHE_USER_TTL: int = 600
+    CACHE_TTL_JITTER: float = 0.1
+    CACHE_NEGATIVE_TTL: int = 30
+    CACHE_SEARCH_TTL: int = 30
+    CACHE_COMPRESSION: str = "zlib"
+    CACHE_COMPRESS_MIN_SIZE: int = 1024
+    CACHE_LOCAL_SIZE: int = 1024
+    CACHE_LOCAL_TTL: float = 5.0
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
+    CACHE_LOCK_TIMEOUT: float = 10.0
+    CACHE_LOCK_WAIT: float = 2.0
+    CACHE_REFRESH_BETA: float = 1.0
+    BATCH_MAX_SIZE: int = 100
+    TIMELINE_PREFIX: str = "timeline"
+    TIMELINE_MAX_SIZE: int = 800
+    TIMELINE_TTL: int = 604800
+    TIMELINE_FANOUT_LIMIT: int = 10000
+    TWEET_SCORES_REFRESH_INTERVAL: float = 60.0
+    TWEET_PURGE_BATCH_SIZE: int = 1000
+    TWEET_PURGE_INTERVAL: float = 3600.0
     ORIGINS: list[str] = []
 
     class Config:
         env_file = env_path
 
 
+class PgBouncerConnection(asyncpg.Connection):
+    """Names prepared statements with a uuid. asyncpg numbers them per
+    process, so two workers sharing a server connection through PgBouncer
+    would prepare the same name."""
+
+    def _get_unique_id(self, prefix: str) -> str:
+        return f"__asyncpg_{prefix}_{uuid.uuid4().hex}__"
+
+
 class DBconfig(BaseSettings):
     DB_NAME: str
     DB_HOST: str
@@ -37,14 +70,50 @@ class DBconfig(BaseSettings):
     DB_PASSWORD: str
     DB_PORT: int
 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_REPLICA_HOSTS: list[str] = []
+    DB_REPLICA_SELECTION: str = "round_robin"
+    DB_REPLICA_MAX_LAG: float = 5.0
+    DB_REPLICA_CHECK_INTERVAL: float = 5.0
+    DB_QUERY_CACHE_SIZE: int = 500
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PGBOUNCER: bool = False
+    DB_SLOW_QUERY_MS: float = 200.0
+
     class Config:
         env_file: str = env_path
 
+    @property
+    def connect_args(self) -> dict:
+        """asyncpg arguments. Behind PgBouncer in transaction pooling mode a
+        prepared statement may be gone on the next transaction, so both
+        statement caches are off."""
+        if self.DB_PGBOUNCER:
+            return {
+                "prepared_statement_cache_size": 0,
+                "statement_cache_size": 0,
+                "connection_class": PgBouncerConnection,
+            }
+        return {
+            "prepared_statement_cache_size": self.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": self.DB_STATEMENT_CACHE_SIZE,
+        }
+
 
 class Redisconfig(BaseSettings):
     REDIS_HOST: str
     REDIS_PORT: int
 
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+
     class Config:
         env_file: str = env_path
 
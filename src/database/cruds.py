@@ -2,10 +2,35 @@ from collections.abc import Sequence
 
 from fastapi import Depends
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import Row, delete, select, update, func
+from sqlalchemy import (
+    CTE,
+    Integer,
+    Row,
+    delete,
+    func,
+    lambda_stmt,
+    literal,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import selectinload
 
-from src.models import Like, Media, Token, Tweet, User, Follower, schemas
+from src.models import (
+    SEARCH_CONFIG,
+    Follower,
+    Like,
+    Media,
+    Token,
+    Tweet,
+    User,
+    schemas,
+    tweet_scores,
+)
+from src.models.dto import TweetDTO
 
 from .abstracts import AbstractAction
 from .database import SQLSession, get_db
@@ -19,6 +44,41 @@ __all__ = (
     "MediaAction",
 )
 
+# Hot statements are built once, at import. Lookups add their criteria
+# in lambda_stmt, so SQLAlchemy keys its compiled cache on the code
+# location instead of walking the statement on every call.
+TWEET_LIVE = Tweet.deleted_at.is_(None)
+TWEET_GET = (
+    select(Tweet)
+    .options(
+        selectinload(Tweet.attachments),
+        selectinload(Tweet.author),
+        selectinload(Tweet.likes),
+    )
+    .where(TWEET_LIVE)
+)
+TWEET_ROWS = select(
+    Tweet.id,
+    Tweet.tweet_data,
+    Tweet.like_count,
+    User.id,
+    User.name,
+    func.array(
+        select(Media.image)
+        .where(Media.tweet_id == Tweet.id)
+        .order_by(Media.id)
+        .scalar_subquery()
+    ),
+    func.array(select(Like.user_id).where(Like.tweet_id == Tweet.id).scalar_subquery()),
+).join(User, User.id == Tweet.user_id).where(TWEET_LIVE)
+USER_GET = select(User).options(
+    selectinload(User.followed),
+    selectinload(User.followers),
+    selectinload(User.likes),
+    selectinload(User.tweets),
+)
+USER_PRINCIPAL = select(User.id, User.name, User.inactive)
+
 
 class TweetAction(AbstractAction):
     def __init__(self, db: SQLSession) -> None:
@@ -40,69 +100,204 @@ class TweetAction(AbstractAction):
         return updated_obj
 
     async def remove(self, tweet_id: int) -> bool:
+        """Hide the tweet, its rows are purged in background. False when it
+        was already deleted."""
         stmt = (
-            delete(self.model)
-            .options(
-                selectinload(self.model.attachments),
-                selectinload(self.model.author),
-                selectinload(self.model.likes),
-            )
-            .where(self.model.id == tweet_id)
+            update(self.model)
+            .where(self.model.id == tweet_id, TWEET_LIVE)
+            .values(deleted_at=func.now())
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
         )
-        stmt_like = delete(Like).where(Like.tweet_id == tweet_id)
         async with self.db as db:
-            await db.session.execute(stmt_like)
-            await db.session.execute(stmt)
-        return True
+            result = await db.session.execute(stmt)
+            return result.first() is not None
+
+    async def get_author_id(self, tweet_id: int) -> int | None:
+        stmt = select(self.model.user_id).where(self.model.id == tweet_id, TWEET_LIVE)
+        async with self.db as db:
+            return await db.session.scalar(stmt)
 
     def _stmt_get(self) -> "select":
-        return select(self.model).options(
-            selectinload(self.model.attachments),
-            selectinload(self.model.author),
-            selectinload(self.model.likes),
-        )
+        return TWEET_GET
 
     async def get(self, tweet_id: int) -> Tweet | None:
-        stmt = self._stmt_get().where(self.model.id == tweet_id)
+        stmt = lambda_stmt(lambda: TWEET_GET)
+        stmt += lambda s: s.where(Tweet.id == tweet_id)
         async with self.db as db:
             result = await db.session.execute(stmt)
         return result.scalars().first()
 
     async def get_all(self, skip: int = 0, limit: int = 100) -> Sequence[Row]:
-        stmt = self._stmt_get().offset(skip).limit(limit)
+        stmt = self._stmt_get().order_by(self.model.id).offset(skip).limit(limit)
         async with self.db as db:
             result = await db.session.execute(stmt)
         return result.scalars().all()
 
-    async def create_like(self, user_id: int, tweet_id: int) -> None:
+    async def get_ids(
+        self, skip: int = 0, limit: int = 100, after_id: int | None = None
+    ) -> list[int]:
+        stmt = (
+            select(self.model.id)
+            .where(TWEET_LIVE)
+            .order_by(self.model.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > after_id)
+        else:
+            stmt = stmt.offset(skip)
         async with self.db as db:
-            like = Like(tweet_id=tweet_id, user_id=user_id)
-            db.session.add(like)
+            result = await db.session.execute(stmt)
+        return list(result.scalars().all())
 
-    async def remove_like(self, user_id: int, tweet_id: int) -> None:
+    async def get_rows(self, tweet_ids: list[int]) -> list[TweetDTO]:
+        """Tweets for reading only, without building ORM objects. Columns of
+        the response only, attachments and likes as arrays."""
+        stmt = lambda_stmt(lambda: TWEET_ROWS)
+        stmt += lambda s: s.where(Tweet.id.in_(tweet_ids))
         async with self.db as db:
-            query = await db.session.execute(
-                select(Like).filter(Like.user_id == user_id, Like.tweet_id == tweet_id)
+            result = await db.session.execute(stmt)
+        return [TweetDTO._make(row) for row in result]
+
+    def _stmt_like_count(self, changed: CTE, delta: int) -> "update":
+        """Moves like_count of the tweets returned by the changed CTE, so the
+        like and the counter are written by one statement."""
+        return (
+            update(self.model)
+            .add_cte(changed)
+            .where(self.model.id.in_(select(changed.c.tweet_id)))
+            .values(like_count=self.model.like_count + delta)
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _stmt_create_likes(self, user_id: int, tweet_ids: list[int]) -> "select":
+        targets = (
+            select(self.model.id)
+            .where(self.model.id.in_(tweet_ids), TWEET_LIVE)
+            .cte("targets")
+        )
+        inserted = (
+            insert(Like)
+            .from_select(
+                ["user_id", "tweet_id"], select(literal(user_id, Integer), targets.c.id)
             )
-            like = query.scalars().first()
-            await db.session.delete(like)
+            .on_conflict_do_nothing()
+            .returning(Like.tweet_id)
+            .cte("inserted")
+        )
+        counted = (
+            update(self.model)
+            .where(self.model.id.in_(select(inserted.c.tweet_id)))
+            .values(like_count=self.model.like_count + 1)
+            .returning(self.model.id)
+            .cte("counted")
+        )
+        return (
+            select(targets.c.id, inserted.c.tweet_id.is_not(None))
+            .add_cte(counted)
+            .select_from(
+                targets.outerjoin(inserted, inserted.c.tweet_id == targets.c.id)
+            )
+        )
 
-    async def check_like(self, user_id: int, tweet_id: int) -> bool:
-        stmt = select(Like).where(Like.user_id == user_id, Like.tweet_id == tweet_id)
+    async def create_likes(self, user_id: int, tweet_ids: list[int]) -> dict[int, bool]:
+        """Like every existing tweet of tweet_ids in one statement.
+
+        Returns the existing tweets, each with True when it was liked now
+        and False when it already was. Deleted tweets count as missing."""
+        async with self.db as db:
+            result = await db.session.execute(
+                self._stmt_create_likes(user_id, tweet_ids)
+            )
+            return dict(result.tuples().all())
+
+    async def remove_like(self, user_id: int, tweet_id: int) -> bool:
+        """False when there was no such like."""
+        deleted = (
+            delete(Like)
+            .where(Like.user_id == user_id, Like.tweet_id == tweet_id)
+            .returning(Like.tweet_id)
+            .cte("deleted")
+        )
+        async with self.db as db:
+            result = await db.session.execute(self._stmt_like_count(deleted, -1))
+            return result.first() is not None
+
+    async def timeline_ids(
+        self,
+        user_id: int,
+        limit: int,
+        before_id: int | None = None,
+        authors: list[int] | None = None,
+        exclude: list[int] | None = None,
+    ) -> list[int]:
+        """Newest tweets of the user and of the users they follow."""
+        followed = select(Follower.followed_id).where(Follower.follower_id == user_id)
+        stmt = (
+            select(self.model.id)
+            .where(
+                or_(self.model.user_id == user_id, self.model.user_id.in_(followed)),
+                TWEET_LIVE,
+            )
+            .order_by(self.model.id.desc())
+            .limit(limit)
+        )
+        if before_id is not None:
+            stmt = stmt.where(self.model.id < before_id)
+        if authors is not None:
+            stmt = stmt.where(self.model.user_id.in_(authors))
+        if exclude:
+            stmt = stmt.where(self.model.user_id.not_in(exclude))
         async with self.db as db:
             result = await db.session.execute(stmt)
-        return bool(result.scalars().all())
-
-    async def rss_popular(self, user_id: int) -> Sequence[Row]:
-        stmt = self._stmt_get()\
-            .join(Follower, Follower.follower_id == user_id)\
-            .join(Like, Like.tweet_id == self.model.id)\
-            .where(self.model.user_id == Follower.followed_id)\
-            .group_by(self.model.id)\
-            .order_by(func.count(self.model.likes).desc())
+        return list(result.scalars().all())
+
+    async def rss_popular(
+        self, user_id: int, limit: int, after: tuple[float, int] | None = None
+    ) -> Sequence[Row]:
+        """(tweet_id, score) of the followed users' tweets, best first, from
+        the tweet_scores view. after is the (score, tweet_id) of the last
+        tweet of the previous page. The view is refreshed periodically, so
+        tweets deleted since are filtered out here."""
+        followed = select(Follower.followed_id).where(Follower.follower_id == user_id)
+        stmt = (
+            select(tweet_scores.c.tweet_id, tweet_scores.c.score)
+            .join(self.model, self.model.id == tweet_scores.c.tweet_id)
+            .where(tweet_scores.c.author_id.in_(followed), TWEET_LIVE)
+            .order_by(tweet_scores.c.score.desc(), tweet_scores.c.tweet_id.desc())
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(tweet_scores.c.score, tweet_scores.c.tweet_id) < tuple_(*after)
+            )
         async with self.db as db:
             result = await db.session.execute(stmt)
-        return result.scalars().all()
+        return result.all()
+
+    async def search(
+        self, query: str, limit: int, after: tuple[float, int] | None = None
+    ) -> Sequence[Row]:
+        """(tweet_id, rank) of the tweets matching query, best first. query
+        takes the web search syntax: words, "phrases", or, -word. after is
+        the (rank, tweet_id) of the last tweet of the previous page."""
+        tsquery = func.websearch_to_tsquery(
+            literal_column(f"'{SEARCH_CONFIG}'::regconfig"), query
+        )
+        rank = func.ts_rank(self.model.search_vector, tsquery)
+        stmt = (
+            select(self.model.id.label("tweet_id"), rank.label("rank"))
+            .where(self.model.search_vector.bool_op("@@")(tsquery), TWEET_LIVE)
+            .order_by(rank.desc(), self.model.id.desc())
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(rank, self.model.id) < tuple_(*after))
+        async with self.db as db:
+            result = await db.session.execute(stmt)
+        return result.all()
 
 
 class UserAction(AbstractAction):
@@ -133,59 +328,125 @@ class UserAction(AbstractAction):
         return True
 
     def _stmt_get(self):
-        return select(self.model).options(
-            selectinload(self.model.followed),
-            selectinload(self.model.followers),
-            selectinload(self.model.likes),
-            selectinload(self.model.tweets),
-            selectinload(self.model.likes),
-        )
+        return USER_GET
 
     async def get(self, user_id: int) -> User | None:
-        stmt = self._stmt_get().where(self.model.id == user_id)
+        stmt = lambda_stmt(lambda: USER_GET)
+        stmt += lambda s: s.where(User.id == user_id)
         async with self.db as db:
             result = await db.session.execute(stmt)
         return result.scalars().first()
 
     async def get_all(self, skip: int = 0, limit: int = 100) -> Sequence[Row]:
-        stmt = self._stmt_get().offset(skip).limit(limit)
+        stmt = self._stmt_get().order_by(self.model.id).offset(skip).limit(limit)
         async with self.db as db:
             result = await db.session.execute(stmt)
         return result.scalars().all()
 
-    async def get_user_by_api_key(self, api_key: str) -> User:
-        stmt = (
-            self._stmt_get()
-            .join(Token, Token.user_id == User.id)
-            .where(Token.api_key == api_key)
+    async def get_ids(
+        self, skip: int = 0, limit: int = 100, after_id: int | None = None
+    ) -> list[int]:
+        stmt = select(self.model.id).order_by(self.model.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > after_id)
+        else:
+            stmt = stmt.offset(skip)
+        async with self.db as db:
+            result = await db.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_many(self, user_ids: list[int]) -> Sequence[Row]:
+        stmt = lambda_stmt(lambda: USER_GET)
+        stmt += lambda s: s.where(User.id.in_(user_ids))
+        async with self.db as db:
+            result = await db.session.execute(stmt)
+        return result.scalars().all()
+
+    def _stmt_principal(self, with_password: bool = False) -> "select":
+        """Columns authentication needs, without any relationship."""
+        if with_password:
+            return USER_PRINCIPAL.add_columns(User.hashed_password)
+        return USER_PRINCIPAL
+
+    async def get_principal_by_api_key(self, api_key: str) -> Row | None:
+        stmt = lambda_stmt(lambda: USER_PRINCIPAL)
+        stmt += lambda s: s.join(Token, Token.user_id == User.id).where(
+            Token.api_key == api_key
         )
         async with self.db as db:
             result = await db.session.execute(stmt)
-        user = result.scalars().first()
-        return user
+        return result.first()
 
-    async def get_by_name(self, name: str) -> User:
-        stmt = self._stmt_get().where(self.model.name == name)
+    async def get_principal_by_name(
+        self, name: str, with_password: bool = False
+    ) -> Row | None:
+        stmt = self._stmt_principal(with_password).where(self.model.name == name)
         async with self.db as db:
             result = await db.session.execute(stmt)
-        user = result.scalars().first()
-        return user
+        return result.first()
 
-    async def add_follow(self, user: User, followed_id) -> None:
-        stmt = select(self.model).filter(self.model.id == followed_id)
+    async def add_follow(self, user_id: int, followed_id: int) -> bool:
+        """False when the user is already followed. A missing user raises
+        IntegrityError."""
+        stmt = (
+            insert(Follower)
+            .values(follower_id=user_id, followed_id=followed_id)
+            .on_conflict_do_nothing()
+            .returning(Follower.followed_id)
+        )
         async with self.db as db:
             result = await db.session.execute(stmt)
-            followed_user = result.scalars().first()
-            user.follow(followed_user)
-            db.session.add(user)
-            await db.session.commit()
+            return result.first() is not None
+
+    def _stmt_add_follows(self, user_id: int, followed_ids: list[int]) -> "select":
+        targets = (
+            select(self.model.id).where(self.model.id.in_(followed_ids)).cte("targets")
+        )
+        inserted = (
+            insert(Follower)
+            .from_select(
+                ["follower_id", "followed_id"],
+                select(literal(user_id, Integer), targets.c.id),
+            )
+            .on_conflict_do_nothing()
+            .returning(Follower.followed_id)
+            .cte("inserted")
+        )
+        return select(targets.c.id, inserted.c.followed_id.is_not(None)).select_from(
+            targets.outerjoin(inserted, inserted.c.followed_id == targets.c.id)
+        )
+
+    async def add_follows(
+        self, user_id: int, followed_ids: list[int]
+    ) -> dict[int, bool]:
+        """Follow every existing user of followed_ids in one statement.
 
-    async def unfollow(self, user: User, unfollowed_id: int) -> None:
-        stmt = self._stmt_get().where(self.model.id == unfollowed_id)
+        Returns the existing users, each with True when they were followed
+        now and False when they already were."""
+        async with self.db as db:
+            result = await db.session.execute(
+                self._stmt_add_follows(user_id, followed_ids)
+            )
+            return dict(result.tuples().all())
+
+    async def exists(self, user_id: int) -> bool:
+        stmt = select(select(self.model.id).where(self.model.id == user_id).exists())
+        async with self.db as db:
+            return await db.session.scalar(stmt)
+
+    async def unfollow(self, user_id: int, unfollowed_id: int) -> bool:
+        """False when the user was not followed."""
+        stmt = (
+            delete(Follower)
+            .where(
+                Follower.follower_id == user_id,
+                Follower.followed_id == unfollowed_id,
+            )
+            .returning(Follower.followed_id)
+        )
         async with self.db as db:
             result = await db.session.execute(stmt)
-            followed_user = result.scalars().first()
-            user.unfollow(followed_user)
+            return result.first() is not None
 
 
 class MediaAction(AbstractAction):
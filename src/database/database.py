@@ -1,18 +1,69 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from collections.abc import AsyncIterator
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from src.config import settings
 
 from .abstracts import AbstractAsyncSession
+from .instrumentation import instrument
+from .routing import ReplicaSet, RoutingSession, create_replica_engines
+
+__all__ = (
+    "SQLSession",
+    "engine",
+    "replicas",
+    "async_session",
+    "get_db",
+    "init_db",
+    "close_db",
+)
+
+engine_options = dict(
+    pool_size=settings.Database.DB_POOL_SIZE,
+    max_overflow=settings.Database.DB_MAX_OVERFLOW,
+    pool_timeout=settings.Database.DB_POOL_TIMEOUT,
+    pool_recycle=settings.Database.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.Database.DB_POOL_PRE_PING,
+    query_cache_size=settings.Database.DB_QUERY_CACHE_SIZE,
+    connect_args=settings.Database.connect_args,
+)
+engine = create_async_engine(settings.DATABASE_URL, **engine_options)
+replicas = ReplicaSet(
+    create_replica_engines(
+        settings.DATABASE_URL, settings.Database.DB_REPLICA_HOSTS, **engine_options
+    ),
+    max_lag=settings.Database.DB_REPLICA_MAX_LAG,
+    check_interval=settings.Database.DB_REPLICA_CHECK_INTERVAL,
+    selection=settings.Database.DB_REPLICA_SELECTION,
+)
+for item in (engine, *replicas.engines):
+    instrument(item.sync_engine)
+async_session = async_sessionmaker(
+    engine,
+    expire_on_commit=False,
+    sync_session_class=RoutingSession,
+    info={"replicas": replicas},
+)
 
-__all__ = ("SQLSession", "engine", "get_db")
 
-engine = create_async_engine(settings.DATABASE_URL)
-async_session = AsyncSession(bind=engine, expire_on_commit=False)
+async def init_db() -> None:
+    """Start watching replica lag, reads use the replicas that keep up."""
+    replicas.start()
+
+
+async def close_db() -> None:
+    await replicas.stop()
 
 
 class SQLSession(AbstractAsyncSession):
-    def __init__(self, session: AsyncSession = async_session) -> None:
-        self.session = session
+    """Unit of work. Every instance owns its session unless one is given."""
+
+    def __init__(self, session: AsyncSession | None = None) -> None:
+        self.session = session or async_session()
 
     async def __aenter__(self) -> "SQLSession":
         return self
@@ -32,5 +83,9 @@ class SQLSession(AbstractAsyncSession):
         await self.session.rollback()
 
 
-def get_db() -> SQLSession:
-    return SQLSession()
+async def get_db() -> AsyncIterator[SQLSession]:
+    db = SQLSession()
+    try:
+        yield db
+    finally:
+        await db.session.close()
@@ -0,0 +1,77 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.config import settings
+from src.exceptions import sql_logger
+
+__all__ = ("QueryStats", "instrument", "track_queries")
+
+
+class QueryStats:
+    """Number and total duration of the statements run while tracking.
+
+    Trackers nest: a statement is counted by the current tracker and by
+    every tracker around it.
+    """
+
+    def __init__(self, parent: "QueryStats | None" = None) -> None:
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+
+    def record(self, duration: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats = stats.parent
+
+    @property
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements of the enclosed code, tasks started inside
+    it included."""
+    stats = QueryStats(parent=_stats.get())
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    if (stats := _stats.get()) is not None:
+        stats.record(duration)
+    if duration * 1000 >= settings.Database.DB_SLOW_QUERY_MS:
+        sql_logger.warning(f"Slow query {duration * 1000:.1f} ms: {statement}")
+
+
+def _handle_error(context) -> None:
+    # a failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.cursor is not None:
+        if starts := context.connection.info.get("query_start"):
+            starts.pop()
+
+
+def instrument(engine: Engine) -> None:
+    """Count the statements of engine and log the slow ones."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
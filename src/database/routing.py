@@ -0,0 +1,144 @@
+import asyncio
+import itertools
+
+from sqlalchemy import Delete, Insert, Select, Update, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from sqlalchemy.sql.selectable import CTE
+
+from src.exceptions import logger
+
+__all__ = ("ReplicaSet", "RoutingSession", "create_replica_engines")
+
+# zero while the replica has replayed everything it received
+LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+
+def create_replica_engines(
+    primary_url: str, hosts: list[str], **engine_options
+) -> list[AsyncEngine]:
+    """Engines for replicas given as host or host:port, with the primary's
+    credentials and database."""
+    url = make_url(primary_url)
+    engines = []
+    for item in hosts:
+        host, _, port = item.partition(":")
+        replica_url = url.set(host=host, port=int(port) if port else url.port)
+        engines.append(create_async_engine(replica_url, **engine_options))
+    return engines
+
+
+class ReplicaSet:
+    """Read replicas that are in sync with the primary.
+
+    A background task checks the replication lag of every replica; the
+    ones behind by more than max_lag seconds, or unreachable, are left
+    out until they catch up. Until the first check, reads stay on the
+    primary.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+        selection: str,
+    ) -> None:
+        if selection not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica selection: {selection}")
+        self.engines = engines
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.selection = selection
+        self.healthy: list[AsyncEngine] = []
+        self._counter = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    def choose(self) -> AsyncEngine | None:
+        if not (healthy := self.healthy):
+            return None
+        if self.selection == "least_connections":
+            return min(
+                healthy, key=lambda engine: engine.sync_engine.pool.checkedout()
+            )
+        return healthy[next(self._counter) % len(healthy)]
+
+    def start(self) -> None:
+        if self.engines and self._task is None:
+            self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.healthy = []
+        for engine in self.engines:
+            await engine.dispose()
+
+    async def _in_sync(self, engine: AsyncEngine) -> bool:
+        try:
+            async with engine.connect() as conn:
+                lag = await conn.scalar(LAG_QUERY)
+        except Exception:
+            logger.exception(f"Replica {engine.url.host} is not available")
+            return False
+        return lag <= self.max_lag
+
+    async def _monitor(self) -> None:
+        while True:
+            in_sync = await asyncio.gather(
+                *(self._in_sync(engine) for engine in self.engines)
+            )
+            self.healthy = [
+                engine for engine, ok in zip(self.engines, in_sync) if ok
+            ]
+            await asyncio.sleep(self.check_interval)
+
+
+def _writes_in_cte(stmt: Select) -> bool:
+    """True for a SELECT with an INSERT, UPDATE or DELETE in a WITH clause."""
+    return any(
+        isinstance(element, CTE)
+        and isinstance(element.element, (Insert, Update, Delete))
+        for element in visitors.iterate(stmt)
+    )
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to a replica and everything else to the primary,
+    SELECTs that write in a CTE included.
+
+    Once a session has written, or locked rows, all its later statements
+    go to the primary too, so a request reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        replicas: ReplicaSet | None = self.info.get("replicas")
+        if replicas is None or self.info.get("use_primary"):
+            return primary
+        if isinstance(clause, StatementLambdaElement):
+            clause = clause._resolved
+        if (
+            self._flushing
+            or isinstance(clause, (Insert, Update, Delete))
+            or not isinstance(clause, Select)
+            or clause._for_update_arg is not None
+            or _writes_in_cte(clause)
+        ):
+            self.info["use_primary"] = True
+            return primary
+        if replica := replicas.choose():
+            return replica.sync_engine
+        return primary
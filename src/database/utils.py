@@ -3,11 +3,9 @@ from src.models.utils import get_password_hash
 
 from . import SQLSession, UserAction
 
-async_session = SQLSession()
-
 
 async def create_users():
-    async with async_session as db:
+    async with SQLSession() as db:
         user_orm = UserAction(db=db)
         users = await user_orm.get_all()
         if len(users) < 1:
@@ -1,3 +1,3 @@
 from .exceptions import *
 from .schemas import get_response_scheme
-from .loggers import logger
+from .loggers import logger, sql_logger
@@ -8,6 +8,7 @@ __all__ = (
     "InactiveUserError",
     "SizeFileError",
     "WrongFileError",
+    "InvalidCursorError",
 )
 
 
@@ -66,3 +67,9 @@ class SizeFileError(UploadImgError):
 
 class WrongFileError(UploadImgError):
     error_message = "Wrong format file"
+
+
+class InvalidCursorError(BaseCustomExc):
+    status_code = 400
+    error_type = "InvalidCursorError"
+    error_message = "Wrong pagination cursor"
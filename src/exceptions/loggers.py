@@ -6,3 +6,10 @@ handler.setLevel(logging.ERROR)
 fmt = logging.Formatter(fmt='%(asctime)s %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 handler.setFormatter(fmt)
 logger.addHandler(handler)
+
+# statement counts of requests and slow statements
+sql_logger = logging.getLogger("sql")
+sql_logger.setLevel(logging.INFO)
+sql_handler = logging.FileHandler(filename='logs/sql.log', mode='a')
+sql_handler.setFormatter(fmt)
+sql_logger.addHandler(sql_handler)
@@ -95,6 +95,17 @@ class FileNotImgError(ErrorBase):
         }
 
 
+class InvalidCursorError(ErrorBase):
+    class Config:
+        schema_extra = {
+            "example": {
+                "result": False,
+                "error_type": "InvalidCursorError",
+                "error_message": "Wrong pagination cursor",
+            }
+        }
+
+
 def get_response_scheme(model: type[BaseModel], description: str | None = None):
     if not description:
         description = model.__name__
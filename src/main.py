@@ -6,7 +6,9 @@ from starlette.requests import Request
 from starlette.responses import HTMLResponse
 
 from src.api import app_api
+from src.cache import close_cache, init_cache
 from src.config import settings
+from src.database.database import close_db, init_db
 from src.database.utils import create_users
 
 app = FastAPI(title="main", debug=settings.App.DEBUG)
@@ -30,10 +32,19 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
+    # lifespan events are not propagated to mounted applications
+    await init_cache()
+    await init_db()
     if settings.App.CREATE_TEST_USERS:
         await create_users()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_cache()
+    await close_db()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
@@ -0,0 +1,40 @@
+"""lookup indexes
+
+Revision ID: 4c2e9a7d1b36
+Revises: f180c7a775e0
+Create Date: 2026-10-18 10:12:45.318204
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4c2e9a7d1b36"
+down_revision = "f180c7a775e0"
+branch_labels = None
+depends_on = None
+
+# name, table, column, unique
+INDEXES = (
+    ("ix_tokens_api_key", "tokens", "api_key", True),
+    ("ix_tokens_user_id", "tokens", "user_id", True),
+    ("ix_users_name", "users", "name", False),
+    ("ix_tweets_user_id", "tweets", "user_id", False),
+    ("ix_likes_tweet_id", "likes", "tweet_id", False),
+    ("ix_followers_followed_id", "followers", "followed_id", False),
+    ("ix_tweet_media_tweet_id", "tweet_media", "tweet_id", False),
+)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY does not lock writes, but cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, column, unique in INDEXES:
+            op.create_index(
+                name, table, [column], unique=unique, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,35 @@
+"""tweet like_count
+
+Revision ID: 9e5f3a8c2d41
+Revises: 4c2e9a7d1b36
+Create Date: 2026-10-18 11:04:27.902551
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9e5f3a8c2d41"
+down_revision = "4c2e9a7d1b36"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tweets",
+        sa.Column("like_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        UPDATE tweets SET like_count = counted.like_count
+        FROM (
+            SELECT tweet_id, count(*) AS like_count FROM likes GROUP BY tweet_id
+        ) AS counted
+        WHERE tweets.id = counted.tweet_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tweets", "like_count")
@@ -0,0 +1,41 @@
+"""tweet_scores materialized view
+
+Revision ID: b71d0e5a9c83
+Revises: 9e5f3a8c2d41
+Create Date: 2026-10-18 13:21:09.640172
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b71d0e5a9c83"
+down_revision = "9e5f3a8c2d41"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # scored from the like_count counter, likes are never aggregated
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW tweet_scores AS
+        SELECT id AS tweet_id,
+               user_id AS author_id,
+               like_count::double precision AS score
+        FROM tweets
+        """
+    )
+    # REFRESH ... CONCURRENTLY needs a unique index
+    op.create_index(
+        "ix_tweet_scores_tweet_id", "tweet_scores", ["tweet_id"], unique=True
+    )
+    op.create_index(
+        "ix_tweet_scores_author_id_score",
+        "tweet_scores",
+        ["author_id", sa.text("score DESC"), sa.text("tweet_id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW tweet_scores")
@@ -0,0 +1,48 @@
+"""tweet soft delete
+
+Revision ID: d4a8c1f6e273
+Revises: b71d0e5a9c83
+Create Date: 2026-10-18 15:02:37.514820
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d4a8c1f6e273"
+down_revision = "b71d0e5a9c83"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # nullable without a default, no table rewrite
+    op.add_column(
+        "tweets", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tweets_live_id",
+            "tweets",
+            ["id"],
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tweets_deleted_at",
+            "tweets",
+            ["deleted_at"],
+            postgresql_where=sa.text("deleted_at IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tweets_deleted_at", table_name="tweets", postgresql_concurrently=True
+        )
+        op.drop_index(
+            "ix_tweets_live_id", table_name="tweets", postgresql_concurrently=True
+        )
+    op.drop_column("tweets", "deleted_at")
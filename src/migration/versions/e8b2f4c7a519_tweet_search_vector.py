@@ -0,0 +1,48 @@
+"""tweet search vector
+
+Revision ID: e8b2f4c7a519
+Revises: d4a8c1f6e273
+Create Date: 2026-10-18 16:40:12.208361
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "e8b2f4c7a519"
+down_revision = "d4a8c1f6e273"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # a stored generated column rewrites the table once, under an exclusive
+    # lock; run it in a quiet window on large tables
+    op.add_column(
+        "tweets",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', content)", persisted=True),
+            nullable=True,
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tweets_search_vector",
+            "tweets",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tweets_search_vector",
+            table_name="tweets",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("tweets", "search_vector")
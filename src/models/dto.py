@@ -0,0 +1,26 @@
+from typing import NamedTuple
+
+__all__ = ("TweetDTO",)
+
+
+class TweetDTO(NamedTuple):
+    """Read-only tweet selected by TweetAction.get_rows, a plain tuple
+    without identity map or attribute instrumentation."""
+
+    id: int
+    content: str
+    like_count: int
+    author_id: int
+    author_name: str
+    attachments: list[str]
+    likes: list[int]
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "content": self.content,
+            "attachments": self.attachments,
+            "author": {"id": self.author_id, "name": self.author_name},
+            "likes": [{"user_id": user_id} for user_id in self.likes],
+            "like_count": self.like_count,
+        }
@@ -1,13 +1,55 @@
-from sqlalchemy import ARRAY, Boolean, ForeignKey, Integer, String
+from datetime import datetime
+
+from sqlalchemy import (
+    ARRAY,
+    Boolean,
+    Column,
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
-__all__ = ("Base", "Tweet", "Like", "User", "Media", "Token", "Follower")
+__all__ = (
+    "Base",
+    "Tweet",
+    "Like",
+    "User",
+    "Media",
+    "Token",
+    "Follower",
+    "tweet_scores",
+    "SEARCH_CONFIG",
+)
+
+# text search configuration of Tweet.search_vector, queries have to use
+# the same one; 'simple' does not stem, so it works for any language
+SEARCH_CONFIG = "simple"
 
 
 class Base(DeclarativeBase):
     ...
 
 
+# materialized view created by a migration, kept out of Base.metadata so
+# create_all and autogenerate leave it alone
+tweet_scores = Table(
+    "tweet_scores",
+    MetaData(),
+    Column("tweet_id", Integer, primary_key=True),
+    Column("author_id", Integer),
+    Column("score", Float),
+)
+
+
 class Tweet(Base):
     """
     Relationship:
@@ -17,6 +59,17 @@ class Tweet(Base):
     """
 
     __tablename__ = "tweets"
+    __table_args__ = (
+        # readers only see tweets that are not deleted
+        Index("ix_tweets_live_id", "id", postgresql_where=text("deleted_at IS NULL")),
+        # deleted tweets still waiting for the purge
+        Index(
+            "ix_tweets_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+        Index("ix_tweets_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     tweet_data: Mapped[str] = mapped_column("content", String(100), nullable=False)
@@ -24,7 +77,21 @@ class Tweet(Base):
         "tweet_media_ids", ARRAY(Integer), nullable=True
     )
     user_id: Mapped[int] = mapped_column(
-        "user_id", ForeignKey("users.id", ondelete="cascade")
+        "user_id", ForeignKey("users.id", ondelete="cascade"), index=True
+    )
+    # kept in step with the likes rows by TweetAction.create_likes/remove_like
+    like_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    # written by Postgres from the content, only read by search
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True),
+        deferred=True,
+    )
+    # set when the author deletes the tweet, the row is purged in background
+    deleted_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
     )
 
     author: Mapped["User"] = relationship(
@@ -47,7 +114,9 @@ class Media(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     image: Mapped[str] = mapped_column("image", String(100))
-    tweet_id: Mapped[int] = mapped_column(ForeignKey("tweets.id", ondelete="cascade"))
+    tweet_id: Mapped[int] = mapped_column(
+        ForeignKey("tweets.id", ondelete="cascade"), index=True
+    )
 
     tweet: Mapped["Tweet"] = relationship(
         "Tweet", back_populates="attachments", uselist=False
@@ -61,7 +130,7 @@ class Follower(Base):
         Integer, ForeignKey("users.id"), primary_key=True
     )
     followed_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("users.id"), primary_key=True
+        Integer, ForeignKey("users.id"), primary_key=True, index=True
     )
 
 
@@ -77,7 +146,7 @@ class User(Base):
     __tablename__ = "users"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    name: Mapped[str] = mapped_column(String(15), nullable=False)
+    name: Mapped[str] = mapped_column(String(15), nullable=False, index=True)
     hashed_password: Mapped[str] = mapped_column(String(100), nullable=False)
     inactive: Mapped[bool] = mapped_column(Boolean, default=False)
 
@@ -123,8 +192,12 @@ class Token(Base):
     __tablename__ = "tokens"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="cascade"))
-    api_key: Mapped[str] = mapped_column(String(50), nullable=False)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="cascade"), unique=True, index=True
+    )
+    api_key: Mapped[str] = mapped_column(
+        String(50), nullable=False, unique=True, index=True
+    )
 
     user: Mapped["User"] = relationship(
         "User", back_populates="token", lazy="joined", uselist=False
@@ -137,7 +210,7 @@ class Like(Base):
         ForeignKey("users.id", ondelete="cascade"), primary_key=True
     )
     tweet_id: Mapped[int] = mapped_column(
-        ForeignKey("tweets.id", ondelete="cascade"), primary_key=True
+        ForeignKey("tweets.id", ondelete="cascade"), primary_key=True, index=True
     )
 
     tweet: Mapped["Tweet"] = relationship(
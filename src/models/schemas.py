@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 
+from src.config import settings
+
 
 class Success(BaseModel):
     result: bool = True
@@ -96,6 +98,7 @@ class Tweet(BaseModel):
     attachments: list[Media]
     author: Author
     likes: list = []
+    like_count: int = 0
 
     class Config:
         orm_mode = True
@@ -114,6 +117,7 @@ class TweetResponse(BaseModel):
     attachments: list[str]
     author: dict
     likes: list = []
+    like_count: int = 0
 
     class Config:
         schema_extra = {
@@ -123,12 +127,14 @@ class TweetResponse(BaseModel):
                 "attachments": [],
                 "author": {"id": 1, "name": "John"},
                 "likes": [],
+                "like_count": 0,
             }
         }
 
 
 class TweetsResponse(BaseModel):
     tweets: list[TweetResponse]
+    next_cursor: str | None = None
 
 
 class TweetSuccess(Success):
@@ -153,3 +159,33 @@ class MediaSuccess(Success):
                 "media_id": 1,
             }
         }
+
+
+class IdsBatch(BaseModel):
+    ids: list[int] = Field(..., min_items=1, max_items=settings.App.BATCH_MAX_SIZE)
+
+    class Config:
+        schema_extra = {"example": {"ids": [1, 2, 3]}}
+
+
+class BatchItem(BaseModel):
+    id: int
+    result: bool
+    # created, exists or not_found
+    status: str
+
+
+class BatchSuccess(Success):
+    items: list[BatchItem]
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "result": True,
+                "items": [
+                    {"id": 1, "result": True, "status": "created"},
+                    {"id": 2, "result": True, "status": "exists"},
+                    {"id": 3, "result": False, "status": "not_found"},
+                ],
+            }
+        }
@@ -0,0 +1,23 @@
+import os
+
+from fastapi import APIRouter
+
+from src.cache import stats
+
+router = APIRouter(tags=["Metrics"], include_in_schema=False)
+
+
+@router.get("/metrics/cache")
+async def cache_metrics():
+    """Read-through cache counters of the worker serving the request."""
+    served = stats["hits"] + stats["negative_hits"]
+    lookups = served + stats["misses"]
+    return {
+        "pid": os.getpid(),
+        "hits": stats["hits"],
+        "negative_hits": stats["negative_hits"],
+        "misses": stats["misses"],
+        "coalesced": stats["coalesced"],
+        "hit_rate": served / lookups if lookups else 0,
+        "negative_hit_rate": stats["negative_hits"] / lookups if lookups else 0,
+    }
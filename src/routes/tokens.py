@@ -4,12 +4,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.security.utils import get_authorization_scheme_param
 from jose import JWTError, jwt
+from sqlalchemy import Row
 from starlette.requests import Request
 
 from src.config import settings
-from src.database import UserAction, get_db
+from src.database import SQLSession, UserAction
 from src.exceptions import InactiveUserError, UnAuthorizedError
-from src.models import User, schemas
+from src.models import schemas
 from src.models.utils import verify_password
 
 
@@ -31,7 +32,7 @@ oauth2_scheme = CustomAuth2(tokenUrl="token", auto_error=False)
 
 
 async def authenticate_user(username: str, password: str):
-    user = await get_user(username=username)
+    user = await get_user(username=username, with_password=True)
     if not user:
         return False
     if not verify_password(password, user.hashed_password):
@@ -40,15 +41,21 @@ async def authenticate_user(username: str, password: str):
 
 
 async def get_user(
-    username: str | None = None, api_key: str | None = None
-) -> User | None:
+    username: str | None = None,
+    api_key: str | None = None,
+    with_password: bool = False,
+) -> Row | None:
+    """Id, name and inactive flag of the user, relationships are left to
+    the endpoints that need them."""
     if not username and not api_key:
         raise ValueError("username or api-key must be defined")
-    user_service = UserAction(db=get_db())
+    user_service = UserAction(db=SQLSession())
     if api_key:
-        return await user_service.get_user_by_api_key(api_key=api_key)
+        return await user_service.get_principal_by_api_key(api_key=api_key)
     elif username:
-        return await user_service.get_by_name(name=username)
+        return await user_service.get_principal_by_name(
+            name=username, with_password=with_password
+        )
     return None
 
 
@@ -65,7 +72,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User | None:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Row | None:
     if "api-key" in token:
         if not (user := await get_user(api_key=token[0])):
             raise UnAuthorizedError
@@ -93,8 +100,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User | None:
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Row = Depends(get_current_user),
+) -> Row:
     if not current_user:
         raise UnAuthorizedError
     elif current_user.inactive:
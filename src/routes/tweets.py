@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, File, UploadFile
+from fastapi import APIRouter, Depends, File, Query, UploadFile
+from sqlalchemy import Row
 from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
 
 from src.exceptions import get_response_scheme
 from src.exceptions import schemas as exc_schemes
-from src.models import User, schemas
+from src.models import schemas
 from src.routes.tokens import get_current_active_user
+from src.routes.utils import conditional_json_response
 from src.services import TweetService, get_tweet_service
 
 router = APIRouter(
@@ -22,7 +26,7 @@ router = APIRouter(
 async def create_tweet(
     new_tweet: schemas.TweetCreate,
     tweet_service: TweetService = Depends(get_tweet_service),
-    user: User = Depends(get_current_active_user),
+    user: Row = Depends(get_current_active_user),
 ):
     """Create new tweet.
 
@@ -60,14 +64,27 @@ async def add_media(
 async def remove_tweet(
     tweet_id: int,
     tweet_service: TweetService = Depends(get_tweet_service),
-    user: User = Depends(get_current_active_user),
+    user: Row = Depends(get_current_active_user),
 ):
-    """Remove tweet.
+    """Remove tweet. It is hidden at once, its likes and media are deleted in
+    background.
 
     - **tweet_id** - id by removing tweet"""
     return await tweet_service.remove(tweet_id=tweet_id, user=user)
 
 
+@router.post("/tweets/likes", response_model=schemas.BatchSuccess)
+async def create_likes(
+    batch: schemas.IdsBatch,
+    tweet_service: TweetService = Depends(get_tweet_service),
+    user: Row = Depends(get_current_active_user),
+):
+    """Like several tweets at once.
+
+    - **ids** - ids of liking tweets, the result of each one is reported in items"""
+    return await tweet_service.create_likes(tweet_ids=batch.ids, user_id=user.id)
+
+
 @router.post(
     "/tweets/{tweet_id}/likes",
     response_model=schemas.Success,
@@ -76,7 +93,7 @@ async def remove_tweet(
 async def create_like(
     tweet_id: int,
     tweet_service: TweetService = Depends(get_tweet_service),
-    user: User = Depends(get_current_active_user),
+    user: Row = Depends(get_current_active_user),
 ):
     """Like tweet.
 
@@ -92,7 +109,7 @@ async def create_like(
 async def remove_like(
     tweet_id: int,
     tweet_service: TweetService = Depends(get_tweet_service),
-    user: User = Depends(get_current_active_user),
+    user: Row = Depends(get_current_active_user),
 ):
     """Dislike tweet.
 
@@ -100,28 +117,100 @@ async def remove_like(
     return await tweet_service.remove_like(tweet_id=tweet_id, user_id=user.id)
 
 
-@router.get("/tweets/rss", response_model=schemas.TweetsResponse)
-async def rss_get(user: User = Depends(get_current_active_user),
+@router.get(
+    "/tweets/feed",
+    response_model=schemas.TweetsResponse,
+    responses={400: get_response_scheme(model=exc_schemes.InvalidCursorError)},
+)
+async def feed_get(
+    limit: int = 50,
+    cursor: str | None = None,
+    user: Row = Depends(get_current_active_user),
+    tweet_service: TweetService = Depends(get_tweet_service),
+):
+    """Home timeline: tweets of the user and of the followed users, newest first.
+
+    - **cursor** - next_cursor of the previous page"""
+    return Response(
+        content=await tweet_service.feed(user_id=user.id, limit=limit, cursor=cursor),
+        media_type="application/json",
+    )
+
+
+@router.get(
+    "/tweets/rss",
+    response_model=schemas.TweetsResponse,
+    responses={400: get_response_scheme(model=exc_schemes.InvalidCursorError)},
+)
+async def rss_get(limit: int = Query(50, ge=1, le=100),
+                  cursor: str | None = None,
+                  user: Row = Depends(get_current_active_user),
                   tweet_service: TweetService = Depends(get_tweet_service)):
-    return await tweet_service.rss(user_id=user.id)
+    """Most liked tweets of the followed users.
+
+    - **cursor** - next_cursor of the previous page"""
+    return Response(
+        content=await tweet_service.rss(user_id=user.id, limit=limit, cursor=cursor),
+        media_type="application/json",
+    )
 
 
 public_router = APIRouter(tags=["Public"])
 
 
-@public_router.get("/tweets", response_model=schemas.TweetsResponse)
+@public_router.get(
+    "/tweets",
+    response_model=schemas.TweetsResponse,
+    responses={400: get_response_scheme(model=exc_schemes.InvalidCursorError)},
+)
 async def get_tweets(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    tweet_service: TweetService = Depends(get_tweet_service),
+):
+    """Get all tweets. Authenticate is not required
+
+    - **cursor** - next_cursor of the previous page, faster than skip on deep pages"""
+    return conditional_json_response(
+        request,
+        content=await tweet_service.get_all(skip=skip, limit=limit, cursor=cursor),
+    )
+
+
+@public_router.get(
+    "/tweets/search",
+    response_model=schemas.TweetsResponse,
+    responses={400: get_response_scheme(model=exc_schemes.InvalidCursorError)},
+)
+async def search_tweets(
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str | None = None,
     tweet_service: TweetService = Depends(get_tweet_service),
 ):
-    """Get all tweets. Authenticate is not required"""
-    return await tweet_service.get_all(skip=skip, limit=limit)
+    """Search tweets, best matching first. Authenticate is not required
 
+    - **q** - words to find, "quoted phrase", or, -excluded word
+    - **cursor** - next_cursor of the previous page"""
+    return Response(
+        content=await tweet_service.search(query=q, limit=limit, cursor=cursor),
+        media_type="application/json",
+    )
 
-@public_router.get("/tweets/{tweet_id}", response_model=schemas.TweetResponse)
+
+@public_router.get(
+    "/tweets/{tweet_id}",
+    response_model=schemas.TweetResponse,
+    responses={404: get_response_scheme(model=exc_schemes.TweetNotExist)},
+)
 async def get_tweet(
-    tweet_id: int, tweet_service: TweetService = Depends(get_tweet_service)
+    request: Request,
+    tweet_id: int,
+    tweet_service: TweetService = Depends(get_tweet_service),
 ):
     """Get tweet. Authenticate is not required"""
-    return await tweet_service.get(tweet_id=tweet_id)
+    return conditional_json_response(
+        request, content=await tweet_service.get(tweet_id=tweet_id)
+    )
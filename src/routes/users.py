@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy import Row
 from starlette import status
+from starlette.responses import Response
 
 from src.exceptions import get_response_scheme
 from src.exceptions import schemas as exc_schemes
-from src.models import User, schemas
+from src.models import schemas
 from src.routes.tokens import get_current_active_user
 from src.services import UserService, get_user_service
-from src.services.utils import serialize_user
 
 router = APIRouter(
     tags=["Users"],
@@ -17,6 +18,22 @@ router = APIRouter(
 )
 
 
+@router.post(
+    "/users/follow",
+    response_model=schemas.BatchSuccess,
+    status_code=status.HTTP_201_CREATED,
+)
+async def add_follows(
+    batch: schemas.IdsBatch,
+    user_service: UserService = Depends(get_user_service),
+    user: Row = Depends(get_current_active_user),
+):
+    """Adding several users to followed at once.
+
+    - ***ids*** - ids of users, the result of each one is reported in items"""
+    return await user_service.add_follows(user=user, followed_ids=batch.ids)
+
+
 @router.post(
     "/users/{user_id}/follow",
     response_model=schemas.Success,
@@ -26,7 +43,7 @@ router = APIRouter(
 async def add_follow(
     user_id: int,
     user_service: UserService = Depends(get_user_service),
-    user: User = Depends(get_current_active_user),
+    user: Row = Depends(get_current_active_user),
 ):
     """Adding user to followed.
 
@@ -43,7 +60,7 @@ async def add_follow(
 async def remove_follow(
     user_id: int,
     user_service: UserService = Depends(get_user_service),
-    user: User = Depends(get_current_active_user),
+    user: Row = Depends(get_current_active_user),
 ):
     """Removing user from followed.
 
@@ -51,14 +68,15 @@ async def remove_follow(
     return await user_service.remove_follow(user=user, unfollowed_id=user_id)
 
 
-@router.get(
-    "/users/me",
-    response_model=schemas.UserInfo,
-    dependencies=[Depends(get_user_service)],
-)
-async def get_self_info(user: User = Depends(get_current_active_user)):
+@router.get("/users/me", response_model=schemas.UserInfo)
+async def get_self_info(
+    user: Row = Depends(get_current_active_user),
+    user_service: UserService = Depends(get_user_service),
+):
     """Get userinfo about self."""
-    return serialize_user(user)
+    return Response(
+        content=await user_service.get(user_id=user.id), media_type="application/json"
+    )
 
 
 @router.get(
@@ -73,18 +91,32 @@ async def get_user_info(
     """Get userinfo bu his id.
 
     - ***user_id*** - id by user"""
-    return await user_service.get(user_id=user_id)
+    return Response(
+        content=await user_service.get(user_id=user_id), media_type="application/json"
+    )
 
 
 @router.get(
     "/users",
     response_model=list[schemas.UserInfo],
     dependencies=[Depends(get_current_active_user)],
+    responses={400: get_response_scheme(model=exc_schemes.InvalidCursorError)},
 )
 async def get_all_users(
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
     user_service: UserService = Depends(get_user_service),
 ):
-    """Get list with all users"""
-    return await user_service.get_all(skip=skip, limit=limit)
+    """Get list with all users.
+
+    - **cursor** - value of the X-Next-Cursor header of the previous page,
+    faster than skip on deep pages"""
+    content, next_cursor = await user_service.get_all(
+        skip=skip, limit=limit, cursor=cursor
+    )
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"X-Next-Cursor": next_cursor} if next_cursor else None,
+    )
@@ -0,0 +1,24 @@
+import hashlib
+
+from starlette import status
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def conditional_json_response(request: Request, content: bytes) -> Response:
+    """JSON response with a strong ETag of the serialized body.
+
+    The body is already a serialized cache document, so answering
+    If-None-Match with 304 costs a hash and no rendering."""
+    etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(etag, request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -1,2 +1,4 @@
 from .users_service import get_user_service, UserService
 from .tweets_services import get_tweet_service, TweetService
+from .timelines_service import get_timeline_service, TimelineService
+from .purge_service import get_purge_service, PurgeService
@@ -0,0 +1,12 @@
+from src.celery.celery_app import purge_tweet
+
+
+class PurgeService:
+    """Deletes the rows and files of soft-deleted tweets in background."""
+
+    def tweet_removed(self, tweet_id: int) -> None:
+        purge_tweet.delay(tweet_id=tweet_id)
+
+
+def get_purge_service() -> PurgeService:
+    return PurgeService()
@@ -0,0 +1,53 @@
+from fastapi import Depends
+
+from src.cache import Timelines, get_timelines
+from src.celery.celery_app import backfill_timeline, fan_out_tweet, prune_timeline
+from src.config import settings
+from src.database import TweetAction, get_tweet_action
+
+
+class TimelineService:
+    """Home timelines, written by Celery tasks when tweets are created and
+    users are followed, read here."""
+
+    def __init__(self, timelines: Timelines, action: TweetAction) -> None:
+        self.timelines = timelines
+        self.action = action
+
+    async def feed_ids(
+        self, user_id: int, limit: int, before_id: int | None = None
+    ) -> list[int]:
+        """Newest tweet ids of the feed, older than before_id if given."""
+        celebrities = await self.timelines.celebrities()
+        if not await self.timelines.exists(user_id):
+            await self.timelines.build(
+                user_id,
+                await self.action.timeline_ids(
+                    user_id,
+                    limit=settings.App.TIMELINE_MAX_SIZE,
+                    exclude=celebrities,
+                ),
+            )
+        tweet_ids = await self.timelines.read(user_id, limit=limit, before_id=before_id)
+        if celebrities:
+            pulled = await self.action.timeline_ids(
+                user_id, limit=limit, before_id=before_id, authors=celebrities
+            )
+            tweet_ids = sorted({*tweet_ids, *pulled}, reverse=True)[:limit]
+        return tweet_ids
+
+    def tweet_created(self, tweet_id: int, author_id: int) -> None:
+        fan_out_tweet.delay(tweet_id=tweet_id, author_id=author_id)
+
+    def followed(self, user_id: int, followed_ids: list[int]) -> None:
+        backfill_timeline.delay(user_id=user_id, followed_ids=followed_ids)
+
+    def unfollowed(self, user_id: int, unfollowed_id: int) -> None:
+        prune_timeline.delay(user_id=user_id, unfollowed_id=unfollowed_id)
+
+
+def get_timeline_service(
+    timelines: Timelines = Depends(get_timelines),
+    action: TweetAction = Depends(get_tweet_action),
+) -> TimelineService:
+    return TimelineService(timelines=timelines, action=action)
@@ -1,12 +1,15 @@
 import base64
 import os
 import uuid
+from functools import partial
 
 from fastapi import Depends, File
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
 
-from src.cache import RedisCache, get_cache
-from src.celery.celery_app import load_file, remove_files
+from src.cache import AbstractCache, get_cache, json_loads, read_through
+from src.celery.celery_app import load_file
 from src.config import settings
 from src.database import MediaAction, TweetAction, get_media_action, get_tweet_action
 from src.exceptions import (
@@ -16,10 +19,24 @@ from src.exceptions import (
     TweetNotExist,
     WrongFileError,
 )
-from src.models import User, schemas
+from src.models import schemas
+from src.models.dto import TweetDTO
 
 from .base_service import Service
-from .utils import _to_json, key_gen
+from .purge_service import PurgeService, get_purge_service
+from .timelines_service import TimelineService, get_timeline_service
+from .utils import (
+    batch_response,
+    decode_cursor,
+    decode_score_cursor,
+    encode_score_cursor,
+    hydrate,
+    key_gen,
+    next_cursor,
+    page_key,
+    search_key,
+    tweets_document,
+)
 
 
 class TweetService(Service):
@@ -27,14 +44,21 @@ class TweetService(Service):
         self,
         main_action: TweetAction,
         media_action: MediaAction,
-        cache: RedisCache,
+        cache: AbstractCache,
         cache_key_prefix: str,
+        timeline_service: TimelineService,
+        purge_service: PurgeService,
     ) -> None:
         self.action = main_action
         self.media_action = media_action
         self.success_response = schemas.Success().dict()
         self.cache = cache
         self.cache_key_prefix = cache_key_prefix
+        self.timeline_service = timeline_service
+        self.purge_service = purge_service
+        self.ids_key_prefix = f"{cache_key_prefix}_ids"
+        # ranked (id, rank) pages of search queries, expire only
+        self.search_key_prefix = f"{cache_key_prefix}_search"
 
     async def create(self, data: schemas.TweetCreate, user_id: int) -> dict:
         obj_in_data = jsonable_encoder(data)
@@ -47,51 +71,70 @@ class TweetService(Service):
         tweet = await self.action.create(data=obj_in_data, user_id=user_id)
         if data.tweet_media_ids:
             await self.media_action.update(tweet=tweet)
-        await self.cache.set_cache(
-            data=jsonable_encoder(tweet), key=key_gen(self.cache_key_prefix, tweet.id)
-        )
+        await self.cache.delete_many(key_parent=self.ids_key_prefix)
+        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, tweet.id))
+        self.timeline_service.tweet_created(tweet_id=tweet.id, author_id=user_id)
         return schemas.TweetSuccess(tweet_id=tweet.id).dict()
 
-    async def get_all(self, skip: int, limit: int) -> dict:
-        result = await self.cache.get_cache(key=key_gen(self.cache_key_prefix))
-        if not result:
-            tweets = await self.action.get_all(skip=skip, limit=limit)
-            tweets = schemas.TweetsSerialize(tweets=tweets)
-            result = _to_json(tweets.dict())
-            await self.cache.set_cache(data=result, key=key_gen(self.cache_key_prefix))
-        return jsonable_encoder(result)
-
-    async def get(self, tweet_id: int) -> list | dict | None:
-        result = await self.cache.get_cache(
-            key=key_gen(self.cache_key_prefix, tweet_id)
+    async def get_all(self, skip: int, limit: int, cursor: str | None = None) -> bytes:
+        """Page of tweets after cursor, or at offset skip without one."""
+        after_id = decode_cursor(cursor) if cursor else None
+        tweet_ids = json_loads(
+            await read_through(
+                self.cache,
+                key=page_key(self.ids_key_prefix, skip, limit, after_id),
+                loader=partial(
+                    self.action.get_ids, skip=skip, limit=limit, after_id=after_id
+                ),
+            )
         )
-        if not result:
-            tweet = await self.action.get(tweet_id=tweet_id)
-            result = jsonable_encoder(tweet)
-            await self.cache.set_cache(
-                data=result,
+        return tweets_document(
+            await self._hydrate(tweet_ids), cursor=next_cursor(tweet_ids, limit)
+        )
+
+    async def get(self, tweet_id: int) -> bytes:
+        if not (
+            result := await read_through(
+                self.cache,
                 key=key_gen(self.cache_key_prefix, tweet_id),
+                loader=partial(self._load, tweet_id=tweet_id),
+                negative=True,
             )
+        ):
+            raise TweetNotExist
         return result
 
+    async def _load(self, tweet_id: int) -> dict | None:
+        if tweets := await self.action.get_rows(tweet_ids=[tweet_id]):
+            return tweets[0].to_dict()
+        return None
+
+    async def _hydrate(self, tweet_ids: list[int]) -> list[bytes]:
+        return await hydrate(
+            self.cache,
+            key_prefix=self.cache_key_prefix,
+            ids=tweet_ids,
+            loader=self.action.get_rows,
+            serializer=TweetDTO.to_dict,
+        )
+
     async def update(self, tweet_id: int, data: schemas.TweetUpdate) -> dict | None:
         updated_tweet = await self.action.update(tweet_id=tweet_id, data=data)
         await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, tweet_id))
         return updated_tweet
 
-    async def remove(self, tweet_id: int, user: "User"):
-        tweet = await self.action.get(tweet_id=tweet_id)
-        if not tweet:
+    async def remove(self, tweet_id: int, user: Row):
+        """Hide the tweet at once, its likes, media and files are purged by a
+        Celery task."""
+        author_id = await self.action.get_author_id(tweet_id=tweet_id)
+        if author_id is None:
             raise TweetNotExist
-        elif not tweet.is_author(user):
+        elif author_id != user.id:
             raise NotAllowedError
-        if tweet.attachments and len(tweet.attachments):
-            del_list = [item.image for item in tweet.attachments]
-            await self.media_action.remove(media_ids=tweet.tweet_media_ids)
-            remove_files.delay(data=del_list)
-        await self.action.remove(tweet_id=tweet_id)
-        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix))
-        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, tweet_id))
+        if await self.action.remove(tweet_id=tweet_id):
+            await self.cache.delete_many(key_parent=self.ids_key_prefix)
+            await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, tweet_id))
+            self.purge_service.tweet_removed(tweet_id=tweet_id)
         return self.success_response
 
     async def add_media(self, file: File) -> dict:
@@ -116,36 +159,94 @@ class TweetService(Service):
         return len(medias) == len(media_ids)
 
     async def create_like(self, tweet_id: int, user_id: int) -> dict:
-        await self.action.create_like(tweet_id=tweet_id, user_id=user_id)
-        if not await self.action.check_like(user_id=user_id, tweet_id=tweet_id):
+        try:
+            results = await self.action.create_likes(
+                user_id=user_id, tweet_ids=[tweet_id]
+            )
+        except IntegrityError:
+            # purged between the liveness check and the insert
             raise TweetNotExist
-        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix))
-        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, tweet_id))
+        if tweet_id not in results:
+            raise TweetNotExist
+        if results[tweet_id]:
+            await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, tweet_id))
         return self.success_response
 
+    async def create_likes(self, tweet_ids: list[int], user_id: int) -> dict:
+        results = await self.action.create_likes(user_id=user_id, tweet_ids=tweet_ids)
+        await self.cache.delete_keys(
+            keys=[
+                key_gen(self.cache_key_prefix, tweet_id)
+                for tweet_id, created in results.items()
+                if created
+            ]
+        )
+        return batch_response(tweet_ids, results)
+
     async def remove_like(self, tweet_id: int, user_id: int) -> dict:
-        if not await self.action.check_like(user_id=user_id, tweet_id=tweet_id):
+        if not await self.action.remove_like(tweet_id=tweet_id, user_id=user_id):
             raise TweetNotExist
-        await self.action.remove_like(tweet_id=tweet_id, user_id=user_id)
-        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix))
         await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, tweet_id))
         return self.success_response
 
-    async def rss(self, user_id: int) -> dict:
-        tweets = await self.action.rss_popular(user_id=user_id)
-        tweets = schemas.TweetsSerialize(tweets=tweets)
-        result = _to_json(tweets.dict())
-        return result
+    async def feed(self, user_id: int, limit: int, cursor: str | None = None) -> bytes:
+        """Home timeline, newest first."""
+        before_id = decode_cursor(cursor) if cursor else None
+        tweet_ids = await self.timeline_service.feed_ids(
+            user_id=user_id, limit=limit, before_id=before_id
+        )
+        return tweets_document(
+            await self._hydrate(tweet_ids), cursor=next_cursor(tweet_ids, limit)
+        )
+
+    async def rss(self, user_id: int, limit: int, cursor: str | None = None) -> bytes:
+        """Most liked tweets of the followed users, scores are refreshed
+        periodically."""
+        after = decode_score_cursor(cursor) if cursor else None
+        rows = await self.action.rss_popular(user_id=user_id, limit=limit, after=after)
+        tweets = await self._hydrate([row.tweet_id for row in rows])
+        next_page = None
+        if rows and len(rows) >= limit:
+            next_page = encode_score_cursor(rows[-1].score, rows[-1].tweet_id)
+        return tweets_document(tweets, cursor=next_page)
+
+    async def search(self, query: str, limit: int, cursor: str | None = None) -> bytes:
+        """Tweets matching query, best ranked first. Pages are cached for
+        CACHE_SEARCH_TTL seconds, new tweets show up once they expire."""
+        after = decode_score_cursor(cursor) if cursor else None
+        rows = json_loads(
+            await read_through(
+                self.cache,
+                key=search_key(self.search_key_prefix, query, limit, cursor),
+                loader=partial(self._search, query=query, limit=limit, after=after),
+                ttl=settings.App.CACHE_SEARCH_TTL,
+            )
+        )
+        tweets = await self._hydrate([tweet_id for tweet_id, _ in rows])
+        next_page = None
+        if rows and len(rows) >= limit:
+            next_page = encode_score_cursor(rows[-1][1], rows[-1][0])
+        return tweets_document(tweets, cursor=next_page)
+
+    async def _search(
+        self, query: str, limit: int, after: tuple[float, int] | None
+    ) -> list[list]:
+        rows = await self.action.search(query=query, limit=limit, after=after)
+        return [[row.tweet_id, row.rank] for row in rows]
 
 
 def get_tweet_service(
     action: TweetAction = Depends(get_tweet_action),
     media_action: MediaAction = Depends(get_media_action),
-    cache: RedisCache = Depends(get_cache),
+    cache: AbstractCache = Depends(get_cache),
+    timeline_service: TimelineService = Depends(get_timeline_service),
+    purge_service: PurgeService = Depends(get_purge_service),
 ) -> TweetService:
     return TweetService(
         main_action=action,
         media_action=media_action,
         cache=cache,
         cache_key_prefix=settings.App.CACHE_TWEET_PREFIX,
+        timeline_service=timeline_service,
+        purge_service=purge_service,
     )
@@ -1,58 +1,100 @@
+from functools import partial
+
 from fastapi import Depends
-from sqlalchemy.exc import InvalidRequestError
-from sqlalchemy.orm.exc import FlushError
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
 
-from src.cache import RedisCache, get_cache
+from src.cache import AbstractCache, get_cache, json_loads, read_through
 from src.config import settings
 from src.database import UserAction, get_user_action
 from src.exceptions import UserNotExist
-from src.models import User, schemas
+from src.models import schemas
 
 from .base_service import Service
-from .utils import key_gen, serialize_user
+from .timelines_service import TimelineService, get_timeline_service
+from .utils import (
+    batch_response,
+    decode_cursor,
+    hydrate,
+    key_gen,
+    next_cursor,
+    page_key,
+    serialize_user,
+    users_document,
+)
 
 
 class UserService(Service):
     def __init__(
-        self, main_action: UserAction, cache: RedisCache, cache_key_prefix: str
+        self,
+        main_action: UserAction,
+        cache: AbstractCache,
+        cache_key_prefix: str,
+        timeline_service: TimelineService,
     ) -> None:
         self.action = main_action
+        self.timeline_service = timeline_service
         self.success_response = schemas.Success().dict()
         self.cache = cache
         self.cache_key_prefix = cache_key_prefix
+        self.ids_key_prefix = f"{cache_key_prefix}_ids"
 
     async def create(self, data: schemas.UserCreate) -> dict:
         user = await self.action.create(data=data)
-        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix))
+        await self.cache.delete_many(key_parent=self.ids_key_prefix)
+        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, user.id))
         return serialize_user(user)
 
-    async def get_all(self, skip: int, limit: int) -> list | dict | None:
-        if not (
-            result := await self.cache.get_cache(key=key_gen(self.cache_key_prefix))
-        ):
-            users = await self.action.get_all(skip=skip, limit=limit)
-            result = [serialize_user(user) for user in users]
-            await self.cache.set_cache(data=result, key=key_gen(self.cache_key_prefix))
-        return result
+    async def get_all(
+        self, skip: int, limit: int, cursor: str | None = None
+    ) -> tuple[bytes, str | None]:
+        """Page of users after cursor, or at offset skip without one, and
+        the cursor of the next page."""
+        after_id = decode_cursor(cursor) if cursor else None
+        user_ids = json_loads(
+            await read_through(
+                self.cache,
+                key=page_key(self.ids_key_prefix, skip, limit, after_id),
+                loader=partial(
+                    self.action.get_ids, skip=skip, limit=limit, after_id=after_id
+                ),
+            )
+        )
+        users = await hydrate(
+            self.cache,
+            key_prefix=self.cache_key_prefix,
+            ids=user_ids,
+            loader=self.action.get_many,
+            serializer=serialize_user,
+        )
+        return users_document(users), next_cursor(user_ids, limit)
 
-    async def get(self, user_id: int) -> list | dict:
+    async def get(self, user_id: int) -> bytes:
         if not (
-            result := await self.cache.get_cache(
-                key=key_gen(self.cache_key_prefix, user_id)
+            result := await read_through(
+                self.cache,
+                key=key_gen(self.cache_key_prefix, user_id),
+                loader=partial(self._load, user_id=user_id),
+                negative=True,
             )
         ):
-            if not (user := await self.action.get(user_id=user_id)):
-                raise UserNotExist
-            result = serialize_user(user)
-            await self.cache.set_cache(
-                data=result, key=key_gen(self.cache_key_prefix, user_id)
-            )
+            raise UserNotExist
         return result
 
+    async def _load(self, user_id: int) -> dict | None:
+        if user := await self.action.get(user_id=user_id):
+            return serialize_user(user)
+        return None
+
     async def remove(self, user_id: int) -> dict:
         await self.action.remove(user_id=user_id)
         await self.cache.delete_many(key_parent=self.cache_key_prefix)
-        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix))
+        await self.cache.delete_many(key_parent=self.ids_key_prefix)
+        # the user's tweets are removed by cascade
+        await self.cache.delete_many(key_parent=settings.App.CACHE_TWEET_PREFIX)
+        await self.cache.delete_many(
+            key_parent=f"{settings.App.CACHE_TWEET_PREFIX}_ids"
+        )
         return self.success_response
 
     async def update(self, user_id: int, data: schemas.UserUpdate) -> dict:
@@ -60,44 +102,57 @@ class UserService(Service):
         if not updated_user:
             raise UserNotExist
         await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, user_id))
-        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix))
         return serialize_user(updated_user)
 
-    async def add_follow(self, user: User, followed_id: int) -> dict:
+    async def add_follow(self, user: Row, followed_id: int) -> dict:
         try:
-            await self.action.add_follow(user=user, followed_id=followed_id)
-            await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, user.id))
-            await self.cache.delete_cache(
-                key=key_gen(self.cache_key_prefix, followed_id)
+            created = await self.action.add_follow(
+                user_id=user.id, followed_id=followed_id
             )
-            await self.cache.delete_cache(key=key_gen(self.cache_key_prefix))
-        except InvalidRequestError:
-            return self.success_response
-        except FlushError:
+        except IntegrityError:
             raise UserNotExist
+        if created:
+            await self._clear_follow(user.id, followed_id)
+            self.timeline_service.followed(user_id=user.id, followed_ids=[followed_id])
         return self.success_response
 
-    async def remove_follow(self, user: User, unfollowed_id: int) -> dict:
-        try:
-            await self.action.unfollow(user=user, unfollowed_id=unfollowed_id)
-            await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, user.id))
-            await self.cache.delete_cache(
-                key=key_gen(self.cache_key_prefix, unfollowed_id)
+    async def add_follows(self, user: Row, followed_ids: list[int]) -> dict:
+        results = await self.action.add_follows(
+            user_id=user.id, followed_ids=followed_ids
+        )
+        if followed := [item_id for item_id, created in results.items() if created]:
+            await self.cache.delete_keys(
+                keys=[
+                    key_gen(self.cache_key_prefix, item_id)
+                    for item_id in (user.id, *followed)
+                ]
+            )
+            self.timeline_service.followed(user_id=user.id, followed_ids=followed)
+        return batch_response(followed_ids, results)
+
+    async def remove_follow(self, user: Row, unfollowed_id: int) -> dict:
+        if await self.action.unfollow(user_id=user.id, unfollowed_id=unfollowed_id):
+            await self._clear_follow(user.id, unfollowed_id)
+            self.timeline_service.unfollowed(
+                user_id=user.id, unfollowed_id=unfollowed_id
             )
-            await self.cache.delete_cache(key=key_gen(self.cache_key_prefix))
-        except ValueError:
-            return self.success_response
-        except TypeError:
+        elif not await self.action.exists(user_id=unfollowed_id):
             raise UserNotExist
         return self.success_response
 
+    async def _clear_follow(self, user_id: int, followed_id: int) -> None:
+        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, user_id))
+        await self.cache.delete_cache(key=key_gen(self.cache_key_prefix, followed_id))
+
 
 def get_user_service(
     main_action: UserAction = Depends(get_user_action),
-    cache: RedisCache = Depends(get_cache),
+    cache: AbstractCache = Depends(get_cache),
+    timeline_service: TimelineService = Depends(get_timeline_service),
 ) -> UserService:
     return UserService(
         main_action=main_action,
         cache=cache,
-        cache_key_prefix=settings.App.CACHE_TWEET_PREFIX,
+        cache_key_prefix=settings.App.CACHE_USER_PREFIX,
+        timeline_service=timeline_service,
     )
@@ -1,6 +1,12 @@
-from fastapi.encoders import jsonable_encoder
+import base64
+import hashlib
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
 from sqlalchemy import Row
 
+from src.cache import AbstractCache, json_dumps
+from src.exceptions import InvalidCursorError
 from src.models import User
 
 
@@ -8,10 +14,110 @@ def key_gen(*args) -> str:
     return ":".join([str(arg) for arg in args])
 
 
-def _to_json(data: dict) -> dict:
-    for item in data["tweets"]:
-        item["attachments"] = [i["image"] for i in item["attachments"]]
-    return jsonable_encoder(data)
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).rstrip(b"=").decode()
+
+
+def _b64decode(cursor: str) -> str:
+    return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Id the page has to start after."""
+    try:
+        return int(_b64decode(cursor))
+    except ValueError:
+        raise InvalidCursorError
+
+
+def encode_score_cursor(score: float, last_id: int) -> str:
+    raw = f"{score!r}:{last_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_score_cursor(cursor: str) -> tuple[float, int]:
+    """Score and id of the last item of the previous page."""
+    try:
+        score, last_id = _b64decode(cursor).split(":")
+        return float(score), int(last_id)
+    except ValueError:
+        raise InvalidCursorError
+
+
+def search_key(key_prefix: str, query: str, limit: int, cursor: str | None) -> str:
+    """Key of a search page, the same for queries that differ in case or
+    spacing only."""
+    normalized = " ".join(query.lower().split())
+    digest = hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+    return key_gen(key_prefix, digest, limit, cursor or "")
+
+
+def next_cursor(ids: list[int], limit: int) -> str | None:
+    """Cursor of the page following ids, None after the last page."""
+    if ids and len(ids) >= limit:
+        return encode_cursor(ids[-1])
+    return None
+
+
+def page_key(key_prefix: str, skip: int, limit: int, after_id: int | None) -> str:
+    """Key of the ordered id list of a page. The lists of a listing share
+    key_prefix and are dropped at once with delete_many when an object is
+    added or removed."""
+    if after_id is None:
+        return key_gen(key_prefix, skip, limit)
+    return key_gen(key_prefix, "after", after_id, limit)
+
+
+async def hydrate(
+    cache: AbstractCache,
+    key_prefix: str,
+    ids: list[int],
+    loader: Callable[[list[int]], Awaitable[Sequence[Any]]],
+    serializer: Callable[[Any], dict],
+) -> list[bytes]:
+    """JSON documents of objects in the order of ids.
+
+    Cached objects come from a single MGET, the rest from a single
+    query and are written back in one pipeline."""
+    keys = [key_gen(key_prefix, item_id) for item_id in ids]
+    items = dict(zip(ids, await cache.get_many(keys=keys)))
+    if missing := [item_id for item_id, item in items.items() if item is None]:
+        loaded = {obj.id: json_dumps(serializer(obj)) for obj in await loader(missing)}
+        await cache.set_many(
+            mapping={
+                key_gen(key_prefix, item_id): item for item_id, item in loaded.items()
+            }
+        )
+        items.update(loaded)
+    return [items[item_id] for item_id in ids if items[item_id]]
+
+
+def batch_response(ids: list[int], results: dict[int, bool]) -> dict:
+    """BatchSuccess for the requested ids, results holds the existing
+    ones and whether they were changed."""
+    items = []
+    for item_id in dict.fromkeys(ids):
+        if item_id not in results:
+            items.append({"id": item_id, "result": False, "status": "not_found"})
+        else:
+            status = "created" if results[item_id] else "exists"
+            items.append({"id": item_id, "result": True, "status": status})
+    return {"result": True, "items": items}
+
+
+def tweets_document(tweets: list[bytes], cursor: str | None = None) -> bytes:
+    """TweetsResponse document assembled from already serialized tweets."""
+    return (
+        b'{"tweets":['
+        + b",".join(tweets)
+        + b'],"next_cursor":'
+        + json_dumps(cursor)
+        + b"}"
+    )
+
+
+def users_document(users: list[bytes]) -> bytes:
+    return b"[" + b",".join(users) + b"]"
 
 
 def serialize_user(user: User | Row) -> dict:
@@ -1,5 +1,6 @@
 import asyncio
-from collections.abc import Generator
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
 
 import pytest
 import pytest_asyncio
@@ -11,11 +12,18 @@ from src.api import app_api
 from src.cache import get_cache
 from src.cache.base_cache_service import AbstractCache
 from src.config import settings
-from src.database import SQLSession, UserAction, get_db
+from src.database import SQLSession, TweetAction, UserAction, get_db, get_tweet_action
+from src.database.instrumentation import QueryStats, instrument, track_queries
 from src.exceptions import UnAuthorizedError
 from src.models import Like, Token, Tweet, User
 from src.models.utils import get_password_hash
 from src.routes.tokens import get_current_active_user, oauth2_scheme
+from src.services import (
+    PurgeService,
+    TimelineService,
+    get_purge_service,
+    get_timeline_service,
+)
 
 
 @pytest.fixture(scope="session")
@@ -39,7 +47,7 @@ async def init_test_data(db):
                 User(name="Mike", hashed_password=get_password_hash("123456")),
             ]
             tweets = [
-                Tweet(tweet_data="Test tweet by John", author=users[0]),
+                Tweet(tweet_data="Test tweet by John", author=users[0], like_count=1),
                 Tweet(tweet_data="Some test data", author=users[1]),
             ]
             db.session.add_all(users)
@@ -56,49 +64,122 @@ class DisableCache(AbstractCache):
     async def get_cache(self, key):
         return None
 
-    async def set_cache(self, data, key):
+    async def get_with_ttl(self, key):
+        return None, None
+
+    async def set_cache(self, data, key, ttl=None):
         return data
 
+    async def get_many(self, keys):
+        return [None] * len(keys)
+
+    async def set_many(self, mapping, ttl=None):
+        pass
+
     async def delete_cache(self, key):
         pass
 
     async def delete_many(self, key_parent: str):
         pass
 
+    async def delete_keys(self, keys):
+        pass
+
+    async def acquire_lock(self, name, timeout):
+        return "nolock"
+
+    async def release_lock(self, name, token):
+        pass
+
+
+@pytest.fixture
+def max_queries():
+    """max_queries(limit) fails the test when the enclosed requests run more
+    than limit statements."""
+
+    @contextmanager
+    def check(limit: int) -> Iterator[QueryStats]:
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= limit, f"{stats.count} queries, expected {limit}"
+
+    return check
+
 
 def get_no_cache() -> DisableCache:
     return DisableCache()
 
 
+class DisableTimelineService(TimelineService):
+    """Feed straight from the database, no Celery tasks."""
+
+    async def feed_ids(self, user_id, limit, before_id=None):
+        return await self.action.timeline_ids(user_id, limit=limit, before_id=before_id)
+
+    def tweet_created(self, tweet_id, author_id):
+        pass
+
+    def followed(self, user_id, followed_ids):
+        pass
+
+    def unfollowed(self, user_id, unfollowed_id):
+        pass
+
+
+def get_no_timelines(
+    action: TweetAction = Depends(get_tweet_action),
+) -> DisableTimelineService:
+    return DisableTimelineService(timelines=None, action=action)
+
+
+class DisablePurgeService(PurgeService):
+    """Deleted tweets stay hidden, no Celery task."""
+
+    def tweet_removed(self, tweet_id):
+        pass
+
+
+def get_no_purge() -> DisablePurgeService:
+    return DisablePurgeService()
+
+
 @pytest_asyncio.fixture
-async def test_app():
+async def db_session():
+    """Session of the test data, rolled back after the test."""
     engine = create_async_engine(settings.DATABASE_URL)
+    instrument(engine.sync_engine)
     conn = await engine.connect()
     trans = await conn.begin()
     session = AsyncSession(bind=conn, expire_on_commit=False)
     await init_test_data(db=SQLSession(session=session))
+    try:
+        yield session
+    finally:
+        await session.close()
+        await trans.rollback()
+        await conn.close()
 
+
+@pytest_asyncio.fixture
+async def test_app(db_session):
     async def get_user(token: str = Depends(oauth2_scheme)):
-        user_orm = UserAction(db=SQLSession(session=session))
+        user_orm = UserAction(db=SQLSession(session=db_session))
         if "api-key" in token and (
-            usr := await user_orm.get_user_by_api_key(api_key=token[0])
+            usr := await user_orm.get_principal_by_api_key(api_key=token[0])
         ):
             return usr
         raise UnAuthorizedError
 
     async def get_test_db():
         try:
-            yield SQLSession(session=session)
+            yield SQLSession(session=db_session)
         finally:
-            await session.close()
+            await db_session.close()
 
     app_api.dependency_overrides[get_cache] = get_no_cache
+    app_api.dependency_overrides[get_timeline_service] = get_no_timelines
+    app_api.dependency_overrides[get_purge_service] = get_no_purge
     app_api.dependency_overrides[get_db] = get_test_db
     app_api.dependency_overrides[get_current_active_user] = get_user
-    try:
-        async with AsyncClient(app=app_api, base_url="http://test.io") as client:
-            yield client
-    finally:
-        await session.close()
-        await trans.rollback()
-        await conn.close()
+    async with AsyncClient(app=app_api, base_url="http://test.io") as client:
+        yield client
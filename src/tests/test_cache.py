@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+
+from src.cache import LocalCache, TwoTierCache, json_dumps, json_loads, read_through
+from src.cache.serializers import Codec
+from src.cache.two_tier_cache import (
+    KEY_MESSAGE,
+    KEYS_MESSAGE,
+    KEYS_SEPARATOR,
+    NAMESPACE_MESSAGE,
+    InvalidationListener,
+)
+from src.tests.conftest import DisableCache
+
+
+class MemoryCache(DisableCache):
+    def __init__(self, nocache=None):
+        self.cache = {}
+
+    async def get_with_ttl(self, key):
+        return self.cache.get(key), None
+
+    async def set_cache(self, data, key, ttl=None):
+        self.cache[key] = data
+
+
+@pytest.mark.asyncio
+async def test_read_through_single_flight():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"tweets": []}
+
+    cache = DisableCache()
+    results = await asyncio.gather(
+        *(read_through(cache, key="tweets", loader=loader) for _ in range(10))
+    )
+    assert calls == 1
+    assert all(json_loads(result) == {"tweets": []} for result in results)
+
+
+@pytest.mark.asyncio
+async def test_read_through_leader_cancelled():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(10)
+        return {"tweets": []}
+
+    cache = DisableCache()
+    leader = asyncio.create_task(read_through(cache, key="tweets", loader=loader))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(read_through(cache, key="tweets", loader=loader))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert json_loads(await waiter) == {"tweets": []}
+    assert calls == 2
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_read_through_remembers_missing():
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        return None
+
+    cache = MemoryCache()
+    for _ in range(3):
+        result = await read_through(cache, key="tweets:0", loader=loader, negative=True)
+        assert result is None
+    assert calls == 1
+
+
+@pytest.mark.parametrize("compression", ("none", "zlib", "lz4"))
+@pytest.mark.parametrize("size", (10, 1000))
+def test_codec_round_trip(compression, size):
+    codec = Codec(compression=compression, min_compress_size=100)
+    payload = json_dumps({"content": "x" * size})
+    raw = codec.dumps(payload)
+    assert codec.loads(raw) == payload
+    assert (len(raw) < len(payload)) == (compression != "none" and size >= 100)
+
+
+@pytest.mark.parametrize("payload", (b'{"id":1}', b"[1,2]", b"null"))
+def test_codec_reads_entries_without_header(payload):
+    assert Codec(compression="zlib", min_compress_size=0).loads(payload) == payload
+
+
+def test_local_cache_evicts_least_recently_used():
+    local = LocalCache(maxsize=2, ttl=60)
+    local.set("tweets:1", b"1")
+    local.set("tweets:2", b"2")
+    local.get("tweets:1")
+    local.set("tweets:3", b"3")
+    assert local.get("tweets:2") is None
+    assert local.get("tweets:1") == b"1"
+    assert local.get("tweets:3") == b"3"
+
+
+def test_local_cache_expires():
+    local = LocalCache(maxsize=2, ttl=-1)
+    local.set("tweets:1", b"1")
+    assert local.get("tweets:1") is None
+    assert len(local) == 0
+
+
+def test_local_cache_drops_namespace():
+    local = LocalCache(maxsize=10, ttl=60)
+    for key in ("tweets_ids", "tweets_ids:0:100", "tweets:1", "tweets_ids_x:1"):
+        local.set(key, b"1")
+    local.delete_namespace("tweets_ids")
+    assert local.get("tweets_ids") is None
+    assert local.get("tweets_ids:0:100") is None
+    assert local.get("tweets:1") == b"1"
+    assert local.get("tweets_ids_x:1") == b"1"
+
+
+@pytest.mark.parametrize(
+    "message,dropped",
+    (
+        (f"{KEY_MESSAGE}tweets:1", {"tweets:1"}),
+        (f"{KEYS_MESSAGE}tweets:1{KEYS_SEPARATOR}users:1", {"tweets:1", "users:1"}),
+        (f"{NAMESPACE_MESSAGE}tweets_ids", {"tweets_ids:0:100"}),
+        ("unknown:tweets:1", set()),
+    ),
+)
+def test_invalidation_message(message, dropped):
+    keys = {"tweets:1", "tweets:2", "users:1", "tweets_ids:0:100"}
+    local = LocalCache(maxsize=10, ttl=60)
+    for key in keys:
+        local.set(key, b"1")
+    InvalidationListener(local=local, channel="cache").apply(message)
+    assert {key for key in keys if local.get(key) is not None} == keys - dropped
+
+
+class RemoteCache(MemoryCache):
+    """Redis stand-in recording what is published."""
+
+    def __init__(self, nocache=None):
+        super().__init__()
+        self.published = []
+
+    async def get_cache(self, key):
+        return self.cache.get(key)
+
+    async def get_many(self, keys):
+        return [self.cache.get(key) for key in keys]
+
+    async def delete_cache(self, key):
+        self.cache.pop(key, None)
+
+    async def delete_keys(self, keys, channel=None):
+        for key in keys:
+            self.cache.pop(key, None)
+        self.published.append(KEYS_MESSAGE + KEYS_SEPARATOR.join(keys))
+
+    async def publish(self, channel, message):
+        self.published.append(message)
+
+
+@pytest.mark.asyncio
+async def test_two_tier_reads_through_local():
+    remote = RemoteCache()
+    remote.cache["tweets:1"] = b"1"
+    cache = TwoTierCache(
+        remote=remote, local=LocalCache(maxsize=10, ttl=60), channel="cache"
+    )
+    assert await cache.get_cache("tweets:1") == b"1"
+    del remote.cache["tweets:1"]
+    assert await cache.get_cache("tweets:1") == b"1"
+    assert await cache.get_many(["tweets:1", "tweets:2"]) == [b"1", None]
+
+
+@pytest.mark.asyncio
+async def test_two_tier_delete_publishes():
+    remote = RemoteCache()
+    local = LocalCache(maxsize=10, ttl=60)
+    cache = TwoTierCache(remote=remote, local=local, channel="cache")
+    await cache.set_cache(data=b"1", key="tweets:1")
+    await cache.delete_cache(key="tweets:1")
+    assert local.get("tweets:1") is None
+    assert remote.published == [f"{KEY_MESSAGE}tweets:1"]
+    # another worker applying the message drops its own copy
+    other = LocalCache(maxsize=10, ttl=60)
+    other.set("tweets:1", b"1")
+    InvalidationListener(local=other, channel="cache").apply(remote.published[0])
+    assert other.get("tweets:1") is None
@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+from sqlalchemy import literal, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import DBconfig, PgBouncerConnection, settings
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pgbouncer", (False, True))
+async def test_connect_args(pgbouncer):
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        connect_args=DBconfig(DB_PGBOUNCER=pgbouncer).connect_args,
+    )
+    try:
+        async with engine.connect() as conn:
+            # uncached statements are prepared again on every run
+            for _ in range(2):
+                assert await conn.scalar(select(literal(1))) == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_pgbouncer_statement_names():
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        connect_args=DBconfig(DB_PGBOUNCER=True).connect_args,
+    )
+    try:
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            assert isinstance(raw, PgBouncerConnection)
+            first = await raw.prepare("SELECT 1")
+            second = await raw.prepare("SELECT 1")
+    finally:
+        await engine.dispose()
+    # numbered names would repeat in every worker process
+    assert first.get_name() != second.get_name()
+    uuid.UUID(first.get_name().strip("_").rsplit("_", 1)[1])
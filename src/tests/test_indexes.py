@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import settings
+
+# hot lookups and the index each of them has to use
+QUERIES = (
+    ("SELECT * FROM tokens WHERE api_key = 'test'", "ix_tokens_api_key"),
+    ("SELECT * FROM tokens WHERE user_id = 1", "ix_tokens_user_id"),
+    ("SELECT * FROM users WHERE name = 'John'", "ix_users_name"),
+    ("SELECT * FROM tweets WHERE user_id = 1", "ix_tweets_user_id"),
+    ("SELECT * FROM likes WHERE tweet_id = 1", "ix_likes_tweet_id"),
+    ("SELECT * FROM followers WHERE followed_id = 1", "ix_followers_followed_id"),
+    ("SELECT * FROM tweet_media WHERE tweet_id = 1", "ix_tweet_media_tweet_id"),
+    (
+        "SELECT id FROM tweets WHERE deleted_at IS NOT NULL ORDER BY deleted_at",
+        "ix_tweets_deleted_at",
+    ),
+    (
+        "SELECT id FROM tweets WHERE search_vector @@ 'john'::tsquery",
+        "ix_tweets_search_vector",
+    ),
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query,index", QUERIES)
+async def test_lookup_uses_index(query, index):
+    engine = create_async_engine(settings.DATABASE_URL)
+    try:
+        async with engine.connect() as conn:
+            # test tables are tiny, a sequential scan would always win
+            await conn.execute(text("SET enable_seqscan = off"))
+            result = await conn.execute(text(f"EXPLAIN {query}"))
+            plan = "\n".join(result.scalars())
+    finally:
+        await engine.dispose()
+    assert index in plan
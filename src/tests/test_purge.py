@@ -0,0 +1,80 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.celery.purge import _delete_in_batches, purge
+from src.config import settings
+from src.models import Like, Media, Tweet, User
+
+LIKES = 5
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine(settings.DATABASE_URL)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def deleted_tweet(engine, tmp_path, monkeypatch):
+    """A committed deleted tweet with LIKES likes and two image files, its
+    users are dropped afterwards."""
+    monkeypatch.setattr(settings.App, "TWEET_PURGE_BATCH_SIZE", 2)
+    images = [tmp_path / f"{i}.png" for i in range(2)]
+    for image in images:
+        image.write_bytes(b"png")
+    async with engine.begin() as conn:
+        user_ids = list(
+            await conn.scalars(
+                insert(User).returning(User.id),
+                [{"name": f"purge{i}", "hashed_password": "-"} for i in range(LIKES)],
+            )
+        )
+        tweet_id = await conn.scalar(
+            insert(Tweet)
+            .values(tweet_data="purge", user_id=user_ids[0], deleted_at=func.now())
+            .returning(Tweet.id)
+        )
+        await conn.execute(
+            insert(Like), [{"user_id": item, "tweet_id": tweet_id} for item in user_ids]
+        )
+        await conn.execute(
+            insert(Media),
+            [{"image": str(image), "tweet_id": tweet_id} for image in images],
+        )
+    try:
+        yield tweet_id, images
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(delete(Like).where(Like.tweet_id == tweet_id))
+            await conn.execute(delete(Media).where(Media.tweet_id == tweet_id))
+            await conn.execute(delete(Tweet).where(Tweet.id == tweet_id))
+            await conn.execute(delete(User).where(User.id.in_(user_ids)))
+
+
+@pytest.mark.asyncio
+async def test_delete_in_batches(engine, deleted_tweet):
+    tweet_id, _ = deleted_tweet
+    likes = select(Like.user_id).where(Like.tweet_id == tweet_id).limit(2)
+    stmt = (
+        delete(Like)
+        .where(Like.tweet_id == tweet_id, Like.user_id.in_(likes.scalar_subquery()))
+        .returning(Like.user_id)
+    )
+    assert await _delete_in_batches(engine, stmt) == LIKES
+
+
+@pytest.mark.asyncio
+async def test_purge(engine, deleted_tweet):
+    tweet_id, images = deleted_tweet
+    await purge(tweet_id)
+    async with engine.connect() as conn:
+        for model in (Like, Media):
+            stmt = select(func.count()).where(model.tweet_id == tweet_id)
+            assert await conn.scalar(stmt) == 0
+        assert await conn.scalar(select(Tweet.id).where(Tweet.id == tweet_id)) is None
+    assert not any(image.exists() for image in images)
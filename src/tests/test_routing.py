@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import insert, lambda_stmt, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import settings
+from src.database.cruds import TweetAction, UserAction
+from src.database.routing import ReplicaSet, RoutingSession, create_replica_engines
+from src.models import User
+
+
+def make_session():
+    primary = create_async_engine(settings.DATABASE_URL)
+    replicas = ReplicaSet(
+        create_replica_engines(settings.DATABASE_URL, ["replica:5433"]),
+        max_lag=5.0,
+        check_interval=5.0,
+        selection="round_robin",
+    )
+    replicas.healthy = list(replicas.engines)
+    session = RoutingSession(bind=primary.sync_engine, info={"replicas": replicas})
+    return session, primary.sync_engine, replicas.engines[0].sync_engine
+
+
+def test_reads_go_to_replica():
+    session, primary, replica = make_session()
+    assert session.get_bind(clause=select(User)) is replica
+    assert session.get_bind(clause=select(User).with_for_update()) is primary
+
+
+def test_lambda_reads_go_to_replica():
+    session, _, replica = make_session()
+    stmt = lambda_stmt(lambda: select(User))
+    stmt += lambda s: s.where(User.id == 1)
+    assert session.get_bind(clause=stmt) is replica
+
+
+def test_reads_after_write_go_to_primary():
+    session, primary, replica = make_session()
+    assert session.get_bind(clause=insert(User)) is primary
+    assert session.get_bind(clause=select(User)) is primary
+
+
+@pytest.mark.parametrize(
+    "stmt",
+    (
+        TweetAction(db=None)._stmt_create_likes(user_id=1, tweet_ids=[1, 2]),
+        UserAction(db=None)._stmt_add_follows(user_id=1, followed_ids=[2, 3]),
+    ),
+)
+def test_writes_in_cte_go_to_primary(stmt):
+    session, primary, _ = make_session()
+    assert session.get_bind(clause=stmt) is primary
+
+
+def test_no_healthy_replica():
+    session, primary, _ = make_session()
+    session.info["replicas"].healthy = []
+    assert session.get_bind(clause=select(User)) is primary
@@ -0,0 +1,84 @@
+import aioredis
+import pytest
+import pytest_asyncio
+
+from src.cache import Timelines
+from src.config import settings
+from src.services import TimelineService
+
+# tweet id: author id, user 3 is a celebrity
+TWEETS = {1: 2, 2: 3, 3: 2, 4: 3, 5: 2}
+CELEBRITY = 3
+
+
+class TweetIds:
+    """timeline_ids over TWEETS, every author followed."""
+
+    async def timeline_ids(
+        self, user_id, limit, before_id=None, authors=None, exclude=None
+    ):
+        tweet_ids = [
+            tweet_id
+            for tweet_id, author_id in TWEETS.items()
+            if (authors is None or author_id in authors)
+            and author_id not in (exclude or ())
+            and (before_id is None or tweet_id < before_id)
+        ]
+        return sorted(tweet_ids, reverse=True)[:limit]
+
+
+@pytest_asyncio.fixture
+async def timelines():
+    redis = aioredis.Redis.from_url(settings.CACHE_URL)
+    timelines = Timelines(redis=redis)
+    timelines.prefix = "test_timeline"
+    timelines.max_size = 5
+    try:
+        yield timelines
+    finally:
+        if keys := await redis.keys(f"{timelines.prefix}:*"):
+            await redis.delete(*keys)
+        await redis.close()
+
+
+@pytest.mark.asyncio
+async def test_push_adds_to_built_timelines_only(timelines):
+    await timelines.build(1, [1, 2])
+    await timelines.push([1, 2], tweet_id=3)
+    assert await timelines.read(1, limit=10) == [3, 2, 1]
+    assert not await timelines.exists(2)
+
+
+@pytest.mark.asyncio
+async def test_build_replaces_and_trims(timelines):
+    await timelines.build(1, [1, 2])
+    await timelines.build(1, list(range(10, 20)))
+    assert await timelines.read(1, limit=10) == [19, 18, 17, 16, 15]
+    await timelines.build(1, [])
+    assert await timelines.exists(1)
+    assert await timelines.read(1, limit=10) == []
+
+
+@pytest.mark.asyncio
+async def test_read_before_id(timelines):
+    await timelines.build(1, list(range(1, 11)))
+    assert await timelines.read(1, limit=2, before_id=9) == [8, 7]
+    assert await timelines.oldest(1) == 6
+
+
+@pytest.mark.asyncio
+async def test_feed_merges_celebrities(timelines):
+    await timelines.set_celebrity(CELEBRITY, True)
+    service = TimelineService(timelines=timelines, action=TweetIds())
+    assert await service.feed_ids(1, limit=10) == [5, 4, 3, 2, 1]
+    # the celebrity's tweets are never written to the timeline
+    assert await timelines.read(1, limit=10) == [5, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_feed_pages_span_both_sources(timelines):
+    await timelines.set_celebrity(CELEBRITY, True)
+    service = TimelineService(timelines=timelines, action=TweetIds())
+    assert await service.feed_ids(1, limit=2) == [5, 4]
+    assert await service.feed_ids(1, limit=2, before_id=4) == [3, 2]
+    assert await service.feed_ids(1, limit=2, before_id=2) == [1]
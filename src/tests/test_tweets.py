@@ -1,6 +1,23 @@
 import pytest
+from sqlalchemy import func, select, text
 
-from src.exceptions import NotAllowedError, TweetNotExist
+from src.exceptions import InvalidCursorError, NotAllowedError, TweetNotExist
+from src.models import Tweet, User
+
+
+async def rss_data(test_app, db_session) -> list[int]:
+    """John follows Mike, whose live tweets are returned best scored first."""
+    mike = await db_session.scalar(select(User).where(User.name == "Mike"))
+    tweets = [
+        Tweet(tweet_data="Liked by many", author=mike, like_count=3),
+        Tweet(tweet_data="Liked by some", author=mike, like_count=2),
+        Tweet(tweet_data="Deleted", author=mike, like_count=5, deleted_at=func.now()),
+    ]
+    db_session.add_all(tweets)
+    await db_session.flush()
+    await test_app.post(f"/users/{mike.id}/follow", headers={"api-key": "test"})
+    await db_session.execute(text("REFRESH MATERIALIZED VIEW tweet_scores"))
+    return [tweets[0].id, tweets[1].id]
 
 
 @pytest.mark.asyncio
@@ -25,6 +42,118 @@ async def test_get_tweets(test_app):
     assert len(data["tweets"]) == 2
 
 
+@pytest.mark.asyncio
+async def test_get_tweets_by_cursor(test_app):
+    first = (await test_app.get("/tweets", params={"limit": 1})).json()
+    assert len(first["tweets"]) == 1
+    second = (
+        await test_app.get(
+            "/tweets", params={"limit": 1, "cursor": first["next_cursor"]}
+        )
+    ).json()
+    assert len(second["tweets"]) == 1
+    assert second["tweets"][0]["id"] > first["tweets"][0]["id"]
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_wrong_cursor(test_app):
+    with pytest.raises(InvalidCursorError):
+        await test_app.get("/tweets", params={"cursor": "wrong"})
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_not_modified(test_app):
+    response = await test_app.get("/tweets")
+    etag = response.headers["etag"]
+    response = await test_app.get("/tweets", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+@pytest.mark.asyncio
+async def test_search_tweets(test_app):
+    response = await test_app.get("/tweets/search", params={"q": "john"})
+    assert response.status_code == 200
+    tweets = response.json()["tweets"]
+    assert [tweet["content"] for tweet in tweets] == ["Test tweet by John"]
+
+
+@pytest.mark.asyncio
+async def test_search_tweets_by_cursor(test_app):
+    first = (
+        await test_app.get("/tweets/search", params={"q": "test", "limit": 1})
+    ).json()
+    assert len(first["tweets"]) == 1
+    second = (
+        await test_app.get(
+            "/tweets/search",
+            params={"q": "test", "limit": 1, "cursor": first["next_cursor"]},
+        )
+    ).json()
+    assert len(second["tweets"]) == 1
+    assert second["tweets"][0]["id"] != first["tweets"][0]["id"]
+
+
+@pytest.mark.asyncio
+async def test_search_tweets_wrong_cursor(test_app):
+    with pytest.raises(InvalidCursorError):
+        await test_app.get("/tweets/search", params={"q": "test", "cursor": "wrong"})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit", (0, 101))
+async def test_search_tweets_limit_out_of_range(test_app, limit):
+    response = await test_app.get("/tweets/search", params={"q": "test", "limit": limit})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_get_feed(test_app):
+    response = await test_app.get("/tweets/feed", headers={"api-key": "test"})
+    assert response.status_code == 200
+    tweets = response.json()["tweets"]
+    assert "Test tweet by John" in [tweet["content"] for tweet in tweets]
+    assert [tweet["id"] for tweet in tweets] == sorted(
+        [tweet["id"] for tweet in tweets], reverse=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_rss(test_app, db_session):
+    expected = await rss_data(test_app, db_session)
+    response = await test_app.get("/tweets/rss", headers={"api-key": "test"})
+    assert response.status_code == 200
+    # Mike's seed tweet has no likes
+    assert [tweet["id"] for tweet in response.json()["tweets"]][:2] == expected
+
+
+@pytest.mark.asyncio
+async def test_rss_by_cursor(test_app, db_session):
+    expected = await rss_data(test_app, db_session)
+    first = (
+        await test_app.get(
+            "/tweets/rss", params={"limit": 1}, headers={"api-key": "test"}
+        )
+    ).json()
+    second = (
+        await test_app.get(
+            "/tweets/rss",
+            params={"limit": 1, "cursor": first["next_cursor"]},
+            headers={"api-key": "test"},
+        )
+    ).json()
+    assert [first["tweets"][0]["id"], second["tweets"][0]["id"]] == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit", (0, 101))
+async def test_rss_limit_out_of_range(test_app, limit):
+    response = await test_app.get(
+        "/tweets/rss", params={"limit": limit}, headers={"api-key": "test"}
+    )
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_delete_own_tweet(test_app):
     last_tweet = await test_app.get("/tweets", headers={"api-key": "test"})
@@ -32,6 +161,25 @@ async def test_delete_own_tweet(test_app):
     response = await test_app.delete(f"/tweets/{lti}", headers={"api-key": "test"})
     assert response.status_code == 202
     assert response.json() == {"result": True}
+    with pytest.raises(TweetNotExist):
+        await test_app.get(f"/tweets/{lti}")
+    response = await test_app.get("/tweets")
+    assert lti not in [tweet["id"] for tweet in response.json()["tweets"]]
+    with pytest.raises(TweetNotExist):
+        await test_app.delete(f"/tweets/{lti}", headers={"api-key": "test"})
+
+
+@pytest.mark.asyncio
+async def test_like_deleted_tweet(test_app):
+    last_tweet = await test_app.get("/tweets", headers={"api-key": "test"})
+    lti = last_tweet.json()["tweets"][0]["id"]
+    await test_app.delete(f"/tweets/{lti}", headers={"api-key": "test"})
+    with pytest.raises(TweetNotExist):
+        await test_app.post(f"/tweets/{lti}/likes", headers={"api-key": "test"})
+    response = await test_app.post(
+        "/tweets/likes", json={"ids": [lti]}, headers={"api-key": "test"}
+    )
+    assert response.json()["items"][0]["status"] == "not_found"
 
 
 @pytest.mark.asyncio
@@ -52,6 +200,75 @@ async def test_create_like(test_app):
     assert response.json() == {"result": True}
 
 
+@pytest.mark.asyncio
+async def test_like_queries(test_app, max_queries):
+    last_tweet = await test_app.get("/tweets", headers={"api-key": "test"})
+    lti = last_tweet.json()["tweets"][0]["id"]
+    # the principal, then the like with its counter
+    with max_queries(2):
+        await test_app.post(f"/tweets/{lti}/likes", headers={"api-key": "test"})
+    with max_queries(2):
+        await test_app.delete(f"/tweets/{lti}/likes", headers={"api-key": "test"})
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_queries(test_app, max_queries):
+    # ids of the page, then its tweets, whatever the page size
+    with max_queries(2) as stats:
+        response = await test_app.get("/tweets")
+    assert response.headers["server-timing"].endswith(f'"{stats.count} queries"')
+
+
+@pytest.mark.asyncio
+async def test_like_count(test_app):
+    last_tweet = await test_app.get("/tweets", headers={"api-key": "test"})
+    tweet = last_tweet.json()["tweets"][0]
+    await test_app.post(f"/tweets/{tweet['id']}/likes", headers={"api-key": "test"})
+    response = await test_app.get(f"/tweets/{tweet['id']}")
+    assert response.json()["like_count"] == tweet["like_count"] + 1
+    await test_app.delete(f"/tweets/{tweet['id']}/likes", headers={"api-key": "test"})
+    response = await test_app.get(f"/tweets/{tweet['id']}")
+    assert response.json()["like_count"] == tweet["like_count"]
+
+
+@pytest.mark.asyncio
+async def test_like_twice(test_app):
+    last_tweet = await test_app.get("/tweets", headers={"api-key": "test"})
+    tweet = last_tweet.json()["tweets"][1]
+    for _ in range(2):
+        response = await test_app.post(
+            f"/tweets/{tweet['id']}/likes", headers={"api-key": "test"}
+        )
+        assert response.json() == {"result": True}
+    response = await test_app.get(f"/tweets/{tweet['id']}")
+    assert response.json()["like_count"] == tweet["like_count"] + 1
+
+
+@pytest.mark.asyncio
+async def test_like_not_exist_tweet(test_app):
+    with pytest.raises(TweetNotExist):
+        await test_app.post("/tweets/0/likes", headers={"api-key": "test"})
+
+
+@pytest.mark.asyncio
+async def test_create_likes(test_app):
+    last_tweet = await test_app.get("/tweets", headers={"api-key": "test"})
+    ids = [tweet["id"] for tweet in last_tweet.json()["tweets"]]
+    response = await test_app.post(
+        "/tweets/likes", json={"ids": [*ids, 0]}, headers={"api-key": "test"}
+    )
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["items"]] == [
+        "created",
+        "created",
+        "not_found",
+    ]
+    response = await test_app.post(
+        "/tweets/likes", json={"ids": ids[:1]}, headers={"api-key": "test"}
+    )
+    assert response.json()["items"][0]["status"] == "exists"
+
+
 @pytest.mark.asyncio
 async def test_remove_not_self_like(test_app):
     last_tweet = await test_app.get("/tweets", headers={"api-key": "test"})
@@ -59,3 +276,9 @@ async def test_remove_not_self_like(test_app):
     lti = data[1]["id"]
     with pytest.raises(TweetNotExist):
         await test_app.delete(f"/tweets/{lti}/likes", headers={"api-key": "test"})
+
+
+@pytest.mark.asyncio
+async def test_get_not_exist_tweet(test_app):
+    with pytest.raises(TweetNotExist):
+        await test_app.get("/tweets/0")
@@ -1,6 +1,6 @@
 import pytest
 
-from src.exceptions import UnAuthorizedError
+from src.exceptions import UnAuthorizedError, UserNotExist
 
 
 @pytest.mark.asyncio
@@ -48,3 +48,38 @@ async def test_follow(test_app):
     response = await test_app.post(f"/users/{lu}/follow", headers={"api-key": "test"})
     assert response.status_code == 201
     assert response.json() == {"result": True}
+
+
+@pytest.mark.asyncio
+async def test_follow_queries(test_app, max_queries):
+    response = await test_app.get("/users", headers={"api-key": "test"})
+    lu = response.json()[1]["user"]["id"]
+    # the principal, then the follow
+    with max_queries(2):
+        await test_app.post(f"/users/{lu}/follow", headers={"api-key": "test"})
+
+
+@pytest.mark.asyncio
+async def test_follow_not_exist_user(test_app):
+    with pytest.raises(UserNotExist):
+        await test_app.post("/users/0/follow", headers={"api-key": "test"})
+
+
+@pytest.mark.asyncio
+async def test_unfollow_not_exist_user(test_app):
+    with pytest.raises(UserNotExist):
+        await test_app.delete("/users/0/follow", headers={"api-key": "test"})
+
+
+@pytest.mark.asyncio
+async def test_add_follows(test_app):
+    response = await test_app.get("/users", headers={"api-key": "test"})
+    lu = response.json()[1]["user"]["id"]
+    response = await test_app.post(
+        "/users/follow", json={"ids": [lu, 0]}, headers={"api-key": "test"}
+    )
+    assert response.status_code == 201
+    assert response.json()["items"] == [
+        {"id": lu, "result": True, "status": "created"},
+        {"id": 0, "result": False, "status": "not_found"},
+    ]